@@ -0,0 +1,150 @@
+"""
+Cache Store - Persistent TTL cache backed by SQLite
+持久化缓存 - 基于SQLite的TTL缓存，进程重启后仍可复用
+"""
+
+import io
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  parquet读写引擎
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# 默认缓存目录，与价格数据的parquet缓存放在一起
+DEFAULT_CACHE_DIR = Path("~/.cache/stock_scanner").expanduser()
+
+# 缓存值的编码类型
+KIND_PICKLE = 0
+KIND_PARQUET = 1
+
+
+class SqliteCache:
+    """SQLite持久化TTL缓存"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        初始化缓存
+
+        Args:
+            path: 数据库文件路径
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 连接跨线程共享，写操作由锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, ts REAL NOT NULL, ttl REAL NOT NULL, blob BLOB NOT NULL, "
+            "kind INTEGER NOT NULL DEFAULT 0)"
+        )
+        # 兼容没有kind列的旧库
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+        if 'kind' not in columns:
+            self._conn.execute("ALTER TABLE cache ADD COLUMN kind INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存，过期或不存在时返回None（过期条目顺带删除）
+        
+        Args:
+            key: 缓存键
+            
+        Returns:
+            缓存的值
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+    
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        读取缓存及其剩余有效期，过期或不存在时返回None（过期条目顺带删除）
+        
+        Args:
+            key: 缓存键
+            
+        Returns:
+            (缓存的值, 剩余有效期秒数)
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT blob, kind, ts + ttl - ? FROM cache WHERE key = ?", (now, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                blob, kind, remaining = row
+                if remaining <= 0:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+            return self._decode(blob, kind), remaining
+        except Exception as e:
+            self.logger.warning(f"读取缓存 {key} 失败: {e}")
+            return None
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存的值（需可pickle）
+            ttl: 有效期（秒）
+        """
+        try:
+            blob, kind = self._encode(value)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, ts, ttl, blob, kind) VALUES (?, ?, ?, ?, ?)",
+                    (key, time.time(), ttl, blob, kind)
+                )
+                self._conn.commit()
+        except Exception as e:
+            self.logger.warning(f"写入缓存 {key} 失败: {e}")
+
+    def delete(self, key: str) -> None:
+        """
+        删除缓存条目（数据更新后主动失效）
+
+        Args:
+            key: 缓存键
+        """
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+        except Exception as e:
+            self.logger.warning(f"删除缓存 {key} 失败: {e}")
+
+    @staticmethod
+    def _encode(value: Any) -> Tuple[bytes, int]:
+        """编码缓存值：DataFrame存为parquet，其他值用最高协议的pickle（更小更快）"""
+        if PYARROW_AVAILABLE and isinstance(value, pd.DataFrame):
+            buffer = io.BytesIO()
+            value.to_parquet(buffer, engine='pyarrow', compression='zstd')
+            return buffer.getvalue(), KIND_PARQUET
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), KIND_PICKLE
+
+    @staticmethod
+    def _decode(blob: bytes, kind: int) -> Any:
+        """按类型标记解码缓存值"""
+        if kind == KIND_PARQUET:
+            return pd.read_parquet(io.BytesIO(blob), engine='pyarrow')
+        return pickle.loads(blob)
@@ -10,11 +10,27 @@ from .base import (
     DataSourceError
 )
 
-from .akshare_source import (
-    AkSharePriceDataSource,
-    AkShareFundamentalDataSource,
-    AkShareNewsDataSource
-)
+# akshare数据源按需加载（PEP 562），只用到基类时不导入akshare_source
+_LAZY_EXPORTS = {
+    'AkSharePriceDataSource': '.akshare_source',
+    'AkShareAsyncPriceDataSource': '.akshare_source',
+    'AkShareFundamentalDataSource': '.akshare_source',
+    'AkShareNewsDataSource': '.akshare_source',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
 
 __all__ = [
     'BasePriceDataSource',
@@ -22,6 +38,7 @@ __all__ = [
     'BaseNewsDataSource',
     'DataSourceError',
     'AkSharePriceDataSource',
+    'AkShareAsyncPriceDataSource',
     'AkShareFundamentalDataSource',
     'AkShareNewsDataSource'
 ]
\ No newline at end of file
@@ -15,7 +15,7 @@ def get_cash_flow_data(stock_code):
         
         # akshare 返回的数据列名可能包含特殊字符或空格，为了便于处理，可以进行清理
         # 例如，将列名中的空格替换为下划线
-        df.columns = [col.strip().replace(' ', '_') for col in df.columns]
+        df = df.rename(columns=lambda col: col.strip().replace(' ', '_'))
         
         return df
     except Exception as e:
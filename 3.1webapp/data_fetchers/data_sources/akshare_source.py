@@ -3,28 +3,484 @@ AkShare Data Source Implementation
 AkShare数据源实现 - 基于akshare库的数据源
 """
 
+import asyncio
+import functools
+import importlib.util
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 import pandas as pd
 import numpy as np
-import math
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from .base import BasePriceDataSource, BaseFundamentalDataSource, BaseNewsDataSource, DataSourceError
 
+# akshare依赖树很大（requests/lxml/tqdm等），只检测是否安装，首次调用接口时再导入
+AKSHARE_AVAILABLE = importlib.util.find_spec('akshare') is not None
+ak = None
+_ak_import_lock = threading.Lock()
+
+
+def _ak():
+    """延迟导入akshare，返回模块对象"""
+    global ak
+    if ak is None:
+        with _ak_import_lock:
+            if ak is None:
+                import akshare as ak_mod
+                _install_pooled_session()
+                ak = ak_mod
+    return ak
+
+
+# akshare各子模块直接调用requests.get/post，每次都新建Session并重新握手。
+# 经_ak_call发起的请求改用本线程的keep-alive Session（Session不保证线程安全，按线程各建一个）；
+# 其他代码的requests调用仍走原实现，不共享连接和cookie
+_HTTP_POOL_HOSTS = 16
+_http_local = threading.local()
+_original_request = None
+
+
+def _thread_session():
+    """返回当前线程专用的带连接池Session"""
+    session = getattr(_http_local, 'session', None)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=_HTTP_POOL_HOSTS)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _http_local.session = session
+    return session
+
+
+def _install_pooled_session() -> None:
+    """包装requests模块级请求函数，仅在_ak_call内部的调用使用线程专用Session（只安装一次）"""
+    global _original_request
+    if _original_request is not None:
+        return
+    
+    import requests.api
+    
+    original_request = requests.api.request
+    
+    def request(method, url, **kwargs):
+        if getattr(_http_local, 'depth', 0):
+            return _thread_session().request(method=method, url=url, **kwargs)
+        return original_request(method, url, **kwargs)
+    
+    requests.api.request = request
+    _original_request = original_request
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
 try:
-    import akshare as ak
-    AKSHARE_AVAILABLE = True
+    import pyarrow  # noqa: F401  parquet读写引擎
+    PYARROW_AVAILABLE = True
 except ImportError:
-    ak = None
-    AKSHARE_AVAILABLE = False
+    PYARROW_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+
+class _AkRateLimiter:
+    """akshare接口令牌桶限流器 - 按接口域名分桶，同步调用与线程池调用共享"""
+    
+    def __init__(self, rate: float = 6.0, burst: int = 8):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._condition = threading.Condition()
+    
+    def _take(self, endpoint: str) -> float:
+        """尝试取一个令牌（调用方持有锁），成功返回0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        tokens, last = self._buckets.get(endpoint, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        if tokens >= 1.0:
+            self._buckets[endpoint] = (tokens - 1.0, now)
+            return 0.0
+        self._buckets[endpoint] = (tokens, now)
+        return (1.0 - tokens) / self.rate
+    
+    def acquire(self, endpoint: str) -> None:
+        """获取一个令牌，令牌不足时阻塞等待"""
+        with self._condition:
+            while True:
+                wait = self._take(endpoint)
+                if wait <= 0:
+                    return
+                self._condition.wait(wait)
+    
+    async def acquire_async(self, endpoint: str) -> None:
+        """异步获取一个令牌，与同步调用共用同一个桶，等待时不阻塞事件循环"""
+        while True:
+            with self._condition:
+                wait = self._take(endpoint)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+_rate_limiter = _AkRateLimiter()
+
+# 仅对限流/连接中断类错误退避重试，其他错误直接抛出
+# 不匹配裸"429"：股票代码（如600429）和URL也可能出现在异常文本中
+_RETRYABLE_ERRORS = ("Connection aborted", "RemoteDisconnected", "429 Client Error", "Too Many Requests")
+_MAX_RETRIES = 3
+
+
+def _is_retryable(error: Exception) -> bool:
+    """是否为限流或连接中断类错误；带HTTP响应的异常按状态码判断"""
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    if status_code is not None:
+        return status_code == 429
+    message = str(error)
+    return any(err in message for err in _RETRYABLE_ERRORS)
+
+
+def _ak_call(endpoint: str, func, *args, **kwargs):
+    """经限流器调用akshare接口，遇到429/连接中断时指数退避重试"""
+    delay = 0.5
+    for attempt in range(_MAX_RETRIES + 1):
+        _rate_limiter.acquire(endpoint)
+        _http_local.depth = getattr(_http_local, 'depth', 0) + 1
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= _MAX_RETRIES or not _is_retryable(e):
+                raise
+            logger.debug(f"{endpoint} 接口被限流或连接中断，{delay:.1f}秒后重试: {e}")
+        finally:
+            _http_local.depth -= 1
+        time.sleep(delay)
+        delay *= 2
+
+
+# 历史行情磁盘缓存。盘中最新一根K线仍在变化，超过有效期后只增量拉取缓存末尾之后的数据
+_CACHE_DIR = Path("~/.cache/stock_scanner").expanduser()
+_CACHE_MAX_AGE = 3600
+
+
+def _cached_hist(key: str, fetch_fn: Callable[[Optional[str]], Optional[pd.DataFrame]],
+                 start_date: Optional[str] = None, max_age: float = _CACHE_MAX_AGE) -> Optional[pd.DataFrame]:
+    """
+    带parquet磁盘缓存的历史数据获取
+    
+    Args:
+        key: 缓存键，如 a_stock_000001_365
+        fetch_fn: 数据获取函数，参数为起始日期(YYYYMMDD)，None表示全量获取
+        start_date: 数据窗口起始日期；提供时按date列增量更新并裁剪窗口，否则整表缓存
+        max_age: 缓存有效期（秒）
+        
+    Returns:
+        DataFrame: 历史数据
+    """
+    if not PYARROW_AVAILABLE:
+        return fetch_fn(None)
+    
+    path = _CACHE_DIR / f"{key}.parquet"
+    cached = None
+    if path.exists():
+        try:
+            cached = pd.read_parquet(path, engine='pyarrow')
+        except Exception as e:
+            logger.debug(f"读取缓存 {path} 失败: {e}")
+    
+    if cached is not None and not cached.empty:
+        if time.time() - path.stat().st_mtime < max_age:
+            data = cached
+        elif start_date is not None and 'date' in cached.columns:
+            data = _extend_cached_hist(cached, fetch_fn)
+            if data is None:
+                # 增量获取失败：不重写文件也不刷新修改时间，下次调用继续尝试更新
+                data = cached
+            elif data is cached:
+                # 获取成功但没有新数据（收盘后、周末、节假日）：只刷新修改时间，有效期内不再请求
+                _touch_cache(path)
+            else:
+                data = _trim_hist(data, start_date)
+                _write_cache(path, data)
+        else:
+            data = fetch_fn(None)
+            _write_cache(path, data)
+    else:
+        data = _trim_hist(fetch_fn(None), start_date)
+        _write_cache(path, data)
+    
+    return _trim_hist(data, start_date)
+
+
+def _trim_hist(data: Optional[pd.DataFrame], start_date: Optional[str]) -> Optional[pd.DataFrame]:
+    """裁剪到数据窗口起始日期之后，避免缓存文件无限增长"""
+    if data is None or start_date is None or 'date' not in data.columns:
+        return data
+    start = pd.Timestamp(start_date)
+    if data.empty or data['date'].iloc[0] >= start:
+        return data
+    return data[data['date'] >= start].reset_index(drop=True)
+
+
+def _extend_cached_hist(cached: pd.DataFrame,
+                        fetch_fn: Callable[[Optional[str]], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+    """
+    从缓存中最后一根已收盘K线起增量获取，并拼接到缓存数据之后
+    
+    缓存的最后一根K线可能是盘中写入的未收盘数据，收盘价还会变化，
+    因此以它之前的一根K线作为对齐基准判断是否发生了除权除息
+    
+    Returns:
+        DataFrame: 更新后的数据；获取成功但没有新数据时原样返回cached，获取失败时返回None
+    """
+    dates = cached['date']
+    last_date = dates.max()
+    closed_dates = dates[dates < last_date]
+    anchor_date = closed_dates.max() if not closed_dates.empty else last_date
+    try:
+        fresh = fetch_fn(anchor_date.strftime('%Y%m%d'))
+    except Exception as e:
+        logger.warning(f"增量更新历史数据失败，使用缓存数据: {e}")
+        return None
+    
+    if fresh is None or fresh.empty:
+        return cached
+    
+    # 既没有新交易日，最后一根K线也没变化时视为没有新数据
+    if not (fresh['date'] > last_date).any():
+        fresh_last = fresh.loc[fresh['date'] == last_date, 'close']
+        cached_last = cached.loc[dates == last_date, 'close']
+        if fresh_last.empty or (not cached_last.empty and np.isclose(fresh_last.iloc[-1], cached_last.iloc[-1])):
+            return cached
+    
+    # 已收盘K线的收盘价不一致说明发生了除权除息，前复权价格整体变化，需要全量重新获取
+    overlap = fresh.loc[fresh['date'] == anchor_date, 'close']
+    anchor_close = cached.loc[dates == anchor_date, 'close']
+    if not overlap.empty and not anchor_close.empty and not np.isclose(overlap.iloc[0], anchor_close.iloc[-1]):
+        return fetch_fn(None)
+    
+    data = pd.concat([cached, fresh], ignore_index=True)
+    return data.drop_duplicates(subset='date', keep='last').reset_index(drop=True)
+
+
+def _touch_cache(path: Path) -> None:
+    """刷新缓存文件的修改时间（内容未变，重新开始计算有效期）"""
+    try:
+        os.utime(path)
+    except OSError as e:
+        logger.debug(f"刷新缓存 {path} 修改时间失败: {e}")
+
+
+def _read_fresh_hist(key: str, start_date: str, max_age: float = _CACHE_MAX_AGE) -> Optional[pd.DataFrame]:
+    """读取未过期的parquet缓存并裁剪到数据窗口，无缓存或已过期时返回None"""
+    if not PYARROW_AVAILABLE:
+        return None
+    
+    path = _CACHE_DIR / f"{key}.parquet"
+    try:
+        if time.time() - path.stat().st_mtime >= max_age:
+            return None
+        data = pd.read_parquet(path, engine='pyarrow')
+    except Exception:
+        return None
+    
+    if data.empty or 'date' not in data.columns:
+        return None
+    return data[data['date'] >= pd.Timestamp(start_date)].reset_index(drop=True)
+
+
+def _write_cache(path: Path, data: Optional[pd.DataFrame]) -> None:
+    """写入parquet缓存（先写临时文件再替换，避免并发读到半写入的文件）"""
+    if data is None or data.empty:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        data.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.debug(f"写入缓存 {path} 失败: {e}")
+
+
+# 全市场实时快照短时缓存：spot接口每次返回整个市场，批量查询时复用同一份数据
+_SPOT_TTL = 3.0
+# 行业板块列表变化很慢，整表缓存10分钟
+_INDUSTRY_TTL = 600.0
+_spot_cache: Dict[str, Tuple[float, pd.DataFrame]] = {}
+_spot_locks: Dict[str, threading.Lock] = {}
+_spot_locks_guard = threading.Lock()
+
+
+def _cached_spot(fn_name: str, fn: Callable[[], pd.DataFrame], ttl: float = _SPOT_TTL) -> Optional[pd.DataFrame]:
+    """
+    获取全市场快照（带TTL缓存，并按代码建立索引）
+    
+    Args:
+        fn_name: 快照接口名，作为缓存键
+        fn: 实际获取快照的函数
+        ttl: 缓存有效期（秒）
+        
+    Returns:
+        DataFrame: 以'代码'为索引的快照数据
+    """
+    entry = _spot_cache.get(fn_name)
+    if entry is not None and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+    
+    with _spot_locks_guard:
+        lock = _spot_locks.setdefault(fn_name, threading.Lock())
+    
+    # 同一接口只允许一个线程下载，其余线程等待后直接复用结果
+    with lock:
+        entry = _spot_cache.get(fn_name)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        
+        data = fn()
+        if data is None or data.empty:
+            return None
+        if '代码' in data.columns:
+            data = data.set_index('代码', drop=False)
+        _spot_cache[fn_name] = (time.monotonic(), data)
+        return data
+
+
+# 各市场对应的实时快照接口
+_SPOT_ENDPOINTS = {
+    'a_stock': 'stock_zh_a_spot_em',
+    'hk_stock': 'stock_hk_spot_em',
+    'us_stock': 'stock_us_spot_em',
+}
+
+# 实时价格字段 -> 快照列名
+_REALTIME_FIELDS = {
+    'current_price': '最新价',
+    'change_pct': '涨跌幅',
+    'volume': '成交量',
+    'market_value': '总市值',
+}
+
+
+def _spot_row(data: pd.DataFrame, stock_code: str) -> Optional[pd.Series]:
+    """按代码从快照中取出一行，不存在时返回None"""
+    try:
+        row = data.loc[stock_code]
+    except KeyError:
+        return None
+    if isinstance(row, pd.DataFrame):
+        # 代码重复时取第一条
+        row = row.iloc[0]
+    return row
+
+
+# 基本信息字段 -> 快照列名（股票名称单独处理，缺失时为空字符串）
+_SPOT_INFO_FIELDS = {
+    '当前价格': '最新价', '涨跌幅': '涨跌幅', '市盈率': '市盈率',
+    '市值': '总市值', '成交量': '成交量', '成交额': '成交额',
+    '市净率': '市净率', '振幅': '振幅', '换手率': '换手率'
+}
+_GGT_INFO_FIELDS = {'港股通_总股本': '总股本', '港股通_流通股本': '流通股本'}
+
+
+def _spot_info(row: pd.Series, fields: Dict[str, str] = _SPOT_INFO_FIELDS) -> Dict[str, Any]:
+    """从快照行中一次性取出基本信息字段，缺失列填0"""
+    info = {'股票名称': row.get('名称', '')}
+    info.update(zip(fields, row.reindex(list(fields.values()), fill_value=0)))
+    return info
+
+
+# 东方财富K线接口（akshare的stock_zh_a_hist / stock_hk_hist底层接口）
+_KLINE_URL = "https://push2his.eastmoney.com/api/qt/stock/kline/get"
+_KLINE_UT = "7eea3edcaed734bea9cbfc24409ed989"
+_KLINE_COLUMNS = ['日期', '开盘', '收盘', '最高', '最低', '成交量', '成交额', '振幅', '涨跌幅', '涨跌额', '换手率']
+_KLINE_ADJUST = {'qfq': '1', 'hfq': '2', '': '0'}
+
+
+def _build_kline_request(stock_code: str, market: str, start_date: str, end_date: str,
+                         adjust: str = 'qfq') -> Tuple[str, Dict[str, str]]:
+    """构造东方财富日K线请求的URL和参数"""
+    if market == 'a_stock':
+        secid = f"{1 if stock_code.startswith('6') else 0}.{stock_code}"
+    elif market == 'hk_stock':
+        secid = f"116.{stock_code}"
+    else:
+        raise DataSourceError(f"K线接口不支持的市场类型: {market}")
+
+    params = {
+        'fields1': 'f1,f2,f3,f4,f5,f6',
+        'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61',
+        'ut': _KLINE_UT,
+        'klt': '101',
+        'fqt': _KLINE_ADJUST[adjust],
+        'secid': secid,
+        'beg': start_date,
+        'end': end_date,
+    }
+    return _KLINE_URL, params
+
+
+def _date_window(days: int) -> Tuple[str, str]:
+    """返回最近days天的(开始日期, 结束日期)，格式YYYYMMDD，两端基于同一时刻计算"""
+    now = datetime.now()
+    return (now - timedelta(days=days)).strftime('%Y%m%d'), now.strftime('%Y%m%d')
+
+
+def _as_datetime(values: pd.Series) -> pd.Series:
+    """转换为datetime64；已是datetime64时直接返回，'YYYY-MM-DD'字符串按固定格式解析"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if len(values) and isinstance(values.iloc[0], str) and len(values.iloc[0]) == 10:
+        try:
+            return pd.to_datetime(values, format='%Y-%m-%d', cache=True)
+        except (ValueError, TypeError):
+            pass
+    return pd.to_datetime(values, cache=True)
+
+
+# 价格数据标准化所用的列名映射与列集合
+_PRICE_COL_MAP = {
+    '日期': 'date', '开盘': 'open', '收盘': 'close',
+    '最高': 'high', '最低': 'low', '成交量': 'volume', '成交额': 'amount',
+    '涨跌幅': 'change_pct', '涨跌额': 'change_amount',
+    '振幅': 'amplitude', '换手率': 'turnover'
+}
+_REQUIRED_COLS = ('date', 'open', 'high', 'low', 'close', 'volume')
+_NUMERIC_COLS = ['open', 'high', 'low', 'close', 'volume']
+# 仅用于展示的辅助列，存为float32；OHLCV参与指标计算，保持float64精度
+_AUX_NUMERIC_COLS = ('amount', 'amplitude', 'change_pct', 'change_amount', 'turnover')
+
+
+@functools.lru_cache(maxsize=32)
+def _standard_price_columns(columns: Tuple[str, ...]) -> pd.Index:
+    """按源数据的列布局生成标准列名，同一种布局只映射一次"""
+    return pd.Index([_PRICE_COL_MAP.get(col, col) for col in columns])
+
+# 时间周期 -> 天数
+_PERIOD_MAP = {
+    '1d': 1, '1w': 7, '1m': 30, '3m': 90,
+    '6m': 180, '1y': 365, '2y': 730, '5y': 1825
+}
 
 
 class AkSharePriceDataSource(BasePriceDataSource):
     """AkShare价格数据源"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, executor: Optional[ThreadPoolExecutor] = None):
         self.logger = logging.getLogger(__name__)
         self.name = "AkShare"
+        # 批量获取共用的线程池，避免每次调用重复创建线程；调用方已有线程池时直接复用
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="akshare-price")
     
     def get_stock_data(self, stock_code: str, market: str, period: str = '1y') -> Optional[pd.DataFrame]:
         """获取股票价格数据"""
@@ -46,24 +502,54 @@ class AkSharePriceDataSource(BasePriceDataSource):
             self.logger.error(f"获取{market} {stock_code}价格数据失败: {e}")
             return None
     
+    def get_stock_data_batch(self, stock_codes: List[str], market: str,
+                             period: str = '1y') -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        批量获取股票价格数据（线程池并发）
+        
+        Args:
+            stock_codes: 股票代码列表
+            market: 市场类型
+            period: 时间周期
+            
+        Returns:
+            Dict[str, DataFrame]: 股票代码到价格数据的映射，获取失败的为None
+        """
+        futures = {
+            self._executor.submit(self.get_stock_data, code, market, period): code
+            for code in stock_codes
+        }
+        
+        stock_data = {}
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                stock_data[code] = future.result()
+            except Exception as e:
+                self.logger.error(f"批量获取{market} {code}价格数据失败: {e}")
+                stock_data[code] = None
+        return stock_data
+    
     def _get_a_stock_data(self, stock_code: str, period: str) -> Optional[pd.DataFrame]:
         """获取A股数据"""
         try:
             days = self._parse_period(period)
-            end_date = datetime.now().strftime('%Y%m%d')
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
-            
-            data = ak.stock_zh_a_hist(
-                symbol=stock_code,
-                period="daily",
-                start_date=start_date,
-                end_date=end_date,
-                adjust="qfq"
-            )
+            start_date, end_date = _date_window(days)
             
-            if data is not None and not data.empty:
-                return self._standardize_price_data(data)
-            return None
+            def fetch(since: Optional[str]) -> Optional[pd.DataFrame]:
+                data = _ak_call('push2his', _ak().stock_zh_a_hist,
+                    symbol=stock_code,
+                    period="daily",
+                    start_date=since or start_date,
+                    end_date=end_date,
+                    adjust="qfq"
+                )
+                
+                if data is not None and not data.empty:
+                    return self._standardize_price_data(data)
+                return None
+            
+            return _cached_hist(f"a_stock_{stock_code}_{days}", fetch, start_date)
             
         except Exception as e:
             self.logger.error(f"获取A股{stock_code}数据失败: {e}")
@@ -75,26 +561,31 @@ class AkSharePriceDataSource(BasePriceDataSource):
             # 港股历史数据接口
             try:
                 days = self._parse_period(period)
-                end_date = datetime.now().strftime('%Y%m%d')
-                start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
+                start_date, end_date = _date_window(days)
                 
-                data = ak.stock_hk_hist(
-                    symbol=stock_code,
-                    period="daily",
-                    start_date=start_date,
-                    end_date=end_date,
-                    adjust="qfq"
-                )
+                def fetch(since: Optional[str]) -> Optional[pd.DataFrame]:
+                    data = _ak_call('push2his', _ak().stock_hk_hist,
+                        symbol=stock_code,
+                        period="daily",
+                        start_date=since or start_date,
+                        end_date=end_date,
+                        adjust="qfq"
+                    )
+                    
+                    if data is not None and not data.empty:
+                        return self._standardize_price_data(data)
+                    return None
                 
+                data = _cached_hist(f"hk_stock_{stock_code}_{days}", fetch, start_date)
                 if data is not None and not data.empty:
-                    return self._standardize_price_data(data)
+                    return data
                     
             except Exception as e:
                 self.logger.warning(f"港股历史数据接口失败: {e}，尝试备用接口...")
                 
                 # 备用接口：直接获取港股日线数据
                 try:
-                    data = ak.stock_hk_daily(symbol=stock_code, adjust="qfq")
+                    data = _ak_call('sina', _ak().stock_hk_daily, symbol=stock_code, adjust="qfq")
                     if data is not None and not data.empty:
                         # 过滤最近的数据
                         days = self._parse_period(period)
@@ -116,30 +607,10 @@ class AkSharePriceDataSource(BasePriceDataSource):
             
             # 首先尝试获取美股日线数据（已验证可用）
             try:
-                self.logger.debug(f"使用stock_us_daily接口获取 {stock_code} 数据...")
-                data = ak.stock_us_daily(symbol=stock_code, adjust="qfq")
-                
+                data = _cached_hist(f"us_stock_{stock_code}_{days}",
+                                    lambda since: self._fetch_us_daily(stock_code, days))
                 if data is not None and not data.empty:
-                    # 处理日期索引
-                    if hasattr(data, 'index') and hasattr(data.index, 'name'):
-                        if data.index.name == 'date' or 'date' in str(data.index.name).lower():
-                            # 已经是日期索引，直接使用
-                            data = data.tail(days)
-                        else:
-                            # 重置索引，查找日期列
-                            data = data.reset_index()
-                            if 'date' in data.columns:
-                                data['date'] = pd.to_datetime(data['date'])
-                                data = data.set_index('date').tail(days)
-                            else:
-                                # 没有日期列，使用最近的记录
-                                data = data.tail(days)
-                    else:
-                        # 没有明确的日期索引，使用最近的记录
-                        data = data.tail(days)
-                    
-                    if not data.empty:
-                        return self._standardize_price_data(data)
+                    return data
                         
             except Exception as e:
                 self.logger.warning(f"美股daily接口失败: {e}")
@@ -147,11 +618,10 @@ class AkSharePriceDataSource(BasePriceDataSource):
             # 备用方案：尝试使用历史数据接口（如果存在）
             try:
                 # 检查是否有历史数据接口
-                if hasattr(ak, 'stock_us_hist'):
-                    end_date = datetime.now().strftime('%Y%m%d')
-                    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
+                if hasattr(_ak(), 'stock_us_hist'):
+                    start_date, end_date = _date_window(days)
                     
-                    data = ak.stock_us_hist(
+                    data = _ak_call('push2his', _ak().stock_us_hist,
                         symbol=stock_code,
                         period="daily",
                         start_date=start_date,
@@ -173,132 +643,215 @@ class AkSharePriceDataSource(BasePriceDataSource):
             self.logger.error(f"获取美股{stock_code}数据失败: {e}")
             return None
     
+    def _fetch_us_daily(self, stock_code: str, days: int) -> Optional[pd.DataFrame]:
+        """通过stock_us_daily接口获取美股日线数据"""
+        self.logger.debug(f"使用stock_us_daily接口获取 {stock_code} 数据...")
+        data = _ak_call('sina', _ak().stock_us_daily, symbol=stock_code, adjust="qfq")
+        
+        if data is None or data.empty:
+            return None
+        
+        # 处理日期索引
+        if hasattr(data, 'index') and hasattr(data.index, 'name'):
+            if data.index.name == 'date' or 'date' in str(data.index.name).lower():
+                # 已经是日期索引，直接使用
+                data = data.tail(days)
+            else:
+                # 重置索引，查找日期列
+                data = data.reset_index()
+                if 'date' in data.columns:
+                    data['date'] = _as_datetime(data['date'])
+                    data = data.set_index('date').tail(days)
+                else:
+                    # 没有日期列，使用最近的记录
+                    data = data.tail(days)
+        else:
+            # 没有明确的日期索引，使用最近的记录
+            data = data.tail(days)
+        
+        if data.empty:
+            return None
+        return self._standardize_price_data(data)
+    
     def _parse_period(self, period: str) -> int:
         """解析时间周期"""
-        period_map = {
-            '1d': 1, '1w': 7, '1m': 30, '3m': 90,
-            '6m': 180, '1y': 365, '2y': 730, '5y': 1825
-        }
-        return period_map.get(period, 180)
+        return _PERIOD_MAP.get(period, 180)
     
     def _standardize_price_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """标准化价格数据格式"""
-        # 标准化列名
-        column_mapping = {
-            '日期': 'date', '开盘': 'open', '收盘': 'close',
-            '最高': 'high', '最低': 'low', '成交量': 'volume',
-            '涨跌幅': 'change_pct', '涨跌额': 'change_amount',
-            '振幅': 'amplitude', '换手率': 'turnover'
-        }
-        
-        # 重命名列
-        for old_name, new_name in column_mapping.items():
-            if old_name in data.columns:
-                data = data.rename(columns={old_name: new_name})
+        # 重命名列：直接替换为预先生成的标准列索引
+        data = data.set_axis(_standard_price_columns(tuple(data.columns)), axis=1)
         
         # 确保必要的列存在
-        required_columns = ['date', 'open', 'high', 'low', 'close', 'volume']
-        for col in required_columns:
-            if col not in data.columns:
-                if col == 'volume':
-                    data[col] = 0
-                else:
-                    data[col] = np.nan
+        columns = frozenset(data.columns)
+        data = data.assign(**{
+            col: (0 if col == 'volume' else np.nan)
+            for col in _REQUIRED_COLS if col not in columns
+        })
         
         # 数据类型转换
-        numeric_columns = ['open', 'high', 'low', 'close', 'volume']
-        for col in numeric_columns:
-            if col in data.columns:
-                data[col] = pd.to_numeric(data[col], errors='coerce')
+        data[_NUMERIC_COLS] = data[_NUMERIC_COLS].apply(pd.to_numeric, errors='coerce')
+        aux_cols = [col for col in _AUX_NUMERIC_COLS if col in columns]
+        if aux_cols:
+            data[aux_cols] = data[aux_cols].apply(pd.to_numeric, errors='coerce').astype(np.float32)
         
         # 日期列处理
         if 'date' in data.columns:
-            data['date'] = pd.to_datetime(data['date'])
+            data['date'] = _as_datetime(data['date'])
         
         return data.reset_index(drop=True)
     
     def get_realtime_price(self, stock_code: str, market: str) -> Optional[Dict[str, Any]]:
         """获取实时价格"""
+        return self.get_realtime_price_many([stock_code], market).get(stock_code)
+    
+    def get_realtime_price_many(self, stock_codes: List[str], market: str) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量获取实时价格
+        
+        spot接口一次返回全市场数据，只请求一次快照再按代码取行
+        
+        Args:
+            stock_codes: 股票代码列表
+            market: 市场类型
+            
+        Returns:
+            Dict: 股票代码到实时价格的映射，未找到的代码对应None
+        """
+        prices: Dict[str, Optional[Dict[str, Any]]] = {code: None for code in stock_codes}
         if not AKSHARE_AVAILABLE:
             self.logger.error("akshare库未安装")
-            return None
-            
-        try:
-            if market == 'a_stock':
-                return self._get_a_stock_realtime(stock_code)
-            elif market == 'hk_stock':
-                return self._get_hk_stock_realtime(stock_code)
-            elif market == 'us_stock':
-                return self._get_us_stock_realtime(stock_code)
-            else:
-                return None
-                
-        except Exception as e:
-            self.logger.error(f"获取{market} {stock_code}实时价格失败: {e}")
-            return None
-    
-    def _get_a_stock_realtime(self, stock_code: str) -> Optional[Dict[str, Any]]:
-        """获取A股实时价格"""
-        try:
-            data = ak.stock_zh_a_spot_em()
-            if data is not None and not data.empty:
-                stock_data = data[data['代码'] == stock_code]
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    return {
-                        'current_price': row.get('最新价', 0),
-                        'change_pct': row.get('涨跌幅', 0),
-                        'volume': row.get('成交量', 0),
-                        'market_value': row.get('总市值', 0)
-                    }
-            return None
-        except Exception as e:
-            self.logger.debug(f"获取A股实时价格失败: {e}")
-            return None
-    
-    def _get_hk_stock_realtime(self, stock_code: str) -> Optional[Dict[str, Any]]:
-        """获取港股实时价格"""
-        try:
-            data = ak.stock_hk_spot_em()
-            if data is not None and not data.empty:
-                stock_data = data[data['代码'] == stock_code]
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    return {
-                        'current_price': row.get('最新价', 0),
-                        'change_pct': row.get('涨跌幅', 0),
-                        'volume': row.get('成交量', 0),
-                        'market_value': row.get('总市值', 0)
-                    }
-            return None
-        except Exception as e:
-            self.logger.debug(f"获取港股实时价格失败: {e}")
-            return None
-    
-    def _get_us_stock_realtime(self, stock_code: str) -> Optional[Dict[str, Any]]:
-        """获取美股实时价格"""
+            return prices
+        
+        fn_name = _SPOT_ENDPOINTS.get(market)
+        if fn_name is None or not stock_codes:
+            return prices
+        
         try:
-            data = ak.stock_us_spot_em()
-            if data is not None and not data.empty:
-                stock_data = data[data['代码'] == stock_code]
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    return {
-                        'current_price': row.get('最新价', 0),
-                        'change_pct': row.get('涨跌幅', 0),
-                        'volume': row.get('成交量', 0),
-                        'market_value': row.get('总市值', 0)
-                    }
-            return None
+            data = _cached_spot(fn_name, lambda: _ak_call('push2', getattr(_ak(), fn_name)))
+            if data is None:
+                return prices
+            if not data.index.is_unique:
+                # 代码重复时取第一条
+                data = data[~data.index.duplicated()]
+            
+            found = data.index.intersection(stock_codes)
+            sub = data.reindex(found).reindex(columns=list(_REALTIME_FIELDS.values()), fill_value=0)
+            for code, values in zip(sub.index, sub.itertuples(index=False, name=None)):
+                prices[code] = dict(zip(_REALTIME_FIELDS, values))
+            return prices
+        
         except Exception as e:
-            self.logger.debug(f"获取美股实时价格失败: {e}")
-            return None
+            self.logger.error(f"获取{market}实时价格失败: {e}")
+            return prices
     
     def is_available(self) -> bool:
         """检查数据源是否可用"""
         return AKSHARE_AVAILABLE
 
 
+class AkShareAsyncPriceDataSource(AkSharePriceDataSource):
+    """AkShare异步价格数据源 - 批量获取时基于aiohttp并发请求东方财富K线接口，单只股票沿用同步接口"""
+    
+    def __init__(self, limit: int = 1024, limit_per_host: int = 8, timeout: float = 15.0, max_workers: int = 8,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        super().__init__(max_workers=max_workers, executor=executor)
+        self.name = "AkShareAsync"
+        self.limit = limit
+        # push2his并发过高会被封IP，单主机连接数不超过限流器的突发容量
+        self.limit_per_host = min(limit_per_host, _rate_limiter.burst)
+        self.timeout = timeout
+    
+    async def get_stock_data_many(self, stock_codes: List[str], market: str,
+                                  period: str = '1y') -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        并发获取多只股票的价格数据
+        
+        Args:
+            stock_codes: 股票代码列表
+            market: 市场类型 (a_stock, hk_stock, us_stock)
+            period: 时间周期
+            
+        Returns:
+            Dict[str, DataFrame]: 股票代码到价格数据的映射，获取失败的为None
+        """
+        if not AIOHTTP_AVAILABLE or market not in ('a_stock', 'hk_stock'):
+            # 美股日线接口为新浪数据，没有对应的K线接口，回退到线程池中的同步实现
+            results = await asyncio.gather(
+                *(asyncio.to_thread(super(AkShareAsyncPriceDataSource, self).get_stock_data, code, market, period)
+                  for code in stock_codes)
+            )
+            return dict(zip(stock_codes, results))
+        
+        days = self._parse_period(period)
+        start_date, end_date = _date_window(days)
+        keys = {code: f"{market}_{code}_{days}" for code in stock_codes}
+        
+        # 与同步接口共用parquet磁盘缓存，进程重启后未过期的数据不再请求网络
+        stock_data = {}
+        if PYARROW_AVAILABLE:
+            cached = await asyncio.to_thread(
+                lambda: {code: _read_fresh_hist(key, start_date) for code, key in keys.items()}
+            )
+            stock_data = {code: data for code, data in cached.items() if data is not None and not data.empty}
+        missing = [code for code in stock_codes if code not in stock_data]
+        if not missing:
+            return stock_data
+        
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            results = await asyncio.gather(
+                *(self._fetch_kline(session, code, market, start_date, end_date) for code in missing),
+                return_exceptions=True
+            )
+        
+        fetched = {}
+        retry_codes = []
+        for code, result in zip(missing, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"异步获取{market} {code}价格数据失败，改用限流的同步接口: {result}")
+                result = None
+            if result is None or result.empty:
+                retry_codes.append(code)
+                continue
+            stock_data[code] = result
+            if PYARROW_AVAILABLE:
+                fetched[code] = result
+        
+        # 失败或为空的股票走带限流、重试和磁盘缓存的同步接口
+        if retry_codes:
+            retried = await asyncio.gather(
+                *(asyncio.to_thread(super(AkShareAsyncPriceDataSource, self).get_stock_data, code, market, period)
+                  for code in retry_codes)
+            )
+            stock_data.update(zip(retry_codes, retried))
+        
+        def write_fetched() -> None:
+            for code, data in fetched.items():
+                _write_cache(_CACHE_DIR / f"{keys[code]}.parquet", data)
+        
+        if fetched:
+            await asyncio.to_thread(write_fetched)
+        return stock_data
+    
+    async def _fetch_kline(self, session, stock_code: str, market: str,
+                           start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """请求单只股票的日K线并解析为标准格式"""
+        url, params = _build_kline_request(stock_code, market, start_date, end_date)
+        await _rate_limiter.acquire_async('push2his')
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            payload = await response.json(content_type=None)
+        
+        klines = ((payload or {}).get('data') or {}).get('klines')
+        if not klines:
+            return None
+        
+        data = pd.DataFrame.from_records([line.split(',') for line in klines], columns=_KLINE_COLUMNS)
+        return self._standardize_price_data(data)
+
+
 class AkShareFundamentalDataSource(BaseFundamentalDataSource):
     """AkShare基本面数据源"""
     
@@ -330,12 +883,12 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
         """获取A股基本信息"""
         info = {}
         try:
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
+            stock_info = _ak_call('push2', _ak().stock_individual_info_em, symbol=stock_code)
             if not stock_info.empty:
-                for _, row in stock_info.iterrows():
-                    key = str(row['item']).strip()
-                    value = str(row['value']).strip()
-                    info[key] = value
+                info = dict(zip(
+                    stock_info['item'].astype(str).str.strip(),
+                    stock_info['value'].astype(str).str.strip()
+                ))
         except Exception as e:
             self.logger.warning(f"获取A股基本信息失败: {e}")
         
@@ -343,30 +896,15 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
     
     def _get_hk_stock_info(self, stock_code: str) -> Dict[str, Any]:
         """获取港股基本信息"""
-        info = {}
-        
         # 尝试多种方式获取港股信息
         try:
             # 方法1: 实时数据接口
             try:
-                stock_info = ak.stock_hk_spot_em()
-                if stock_info is not None and not stock_info.empty:
-                    stock_detail = stock_info[stock_info['代码'] == stock_code]
-                    if not stock_detail.empty:
-                        row = stock_detail.iloc[0]
-                        info = {
-                            '股票名称': row.get('名称', ''),
-                            '当前价格': row.get('最新价', 0),
-                            '涨跌幅': row.get('涨跌幅', 0),
-                            '市盈率': row.get('市盈率', 0),
-                            '市值': row.get('总市值', 0),
-                            '成交量': row.get('成交量', 0),
-                            '成交额': row.get('成交额', 0),
-                            '市净率': row.get('市净率', 0),
-                            '振幅': row.get('振幅', 0),
-                            '换手率': row.get('换手率', 0)
-                        }
-                        return info
+                stock_info = _cached_spot('stock_hk_spot_em', lambda: _ak_call('push2', _ak().stock_hk_spot_em))
+                if stock_info is not None:
+                    row = _spot_row(stock_info, stock_code)
+                    if row is not None:
+                        return _spot_info(row)
             except Exception as e:
                 if "Connection aborted" in str(e) or "RemoteDisconnected" in str(e):
                     self.logger.debug(f"港股实时接口网络异常: {e}")
@@ -375,17 +913,11 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
             
             # 方法2: 尝试港股通数据接口
             try:
-                hk_ggt = ak.stock_hk_ggt_components_em()
-                if hk_ggt is not None and not hk_ggt.empty:
-                    hk_detail = hk_ggt[hk_ggt['代码'] == stock_code]
-                    if not hk_detail.empty:
-                        row = hk_detail.iloc[0]
-                        info = {
-                            '股票名称': row.get('名称', ''),
-                            '港股通_总股本': row.get('总股本', 0),
-                            '港股通_流通股本': row.get('流通股本', 0)
-                        }
-                        return info
+                hk_ggt = _cached_spot('stock_hk_ggt_components_em', lambda: _ak_call('push2', _ak().stock_hk_ggt_components_em))
+                if hk_ggt is not None:
+                    row = _spot_row(hk_ggt, stock_code)
+                    if row is not None:
+                        return _spot_info(row, _GGT_INFO_FIELDS)
             except Exception as e:
                 self.logger.debug(f"港股通接口失败: {e}")
                 
@@ -397,30 +929,15 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
     
     def _get_us_stock_info(self, stock_code: str) -> Dict[str, Any]:
         """获取美股基本信息"""
-        info = {}
-        
         # 尝试多种方式获取美股信息
         try:
             # 方法1: 实时数据接口
             try:
-                stock_info = ak.stock_us_spot_em()
-                if stock_info is not None and not stock_info.empty:
-                    stock_detail = stock_info[stock_info['代码'] == stock_code]
-                    if not stock_detail.empty:
-                        row = stock_detail.iloc[0]
-                        info = {
-                            '股票名称': row.get('名称', ''),
-                            '当前价格': row.get('最新价', 0),
-                            '涨跌幅': row.get('涨跌幅', 0),
-                            '市盈率': row.get('市盈率', 0),
-                            '市值': row.get('总市值', 0),
-                            '成交量': row.get('成交量', 0),
-                            '成交额': row.get('成交额', 0),
-                            '市净率': row.get('市净率', 0),
-                            '振幅': row.get('振幅', 0),
-                            '换手率': row.get('换手率', 0)
-                        }
-                        return info
+                stock_info = _cached_spot('stock_us_spot_em', lambda: _ak_call('push2', _ak().stock_us_spot_em))
+                if stock_info is not None:
+                    row = _spot_row(stock_info, stock_code)
+                    if row is not None:
+                        return _spot_info(row)
             except Exception as e:
                 if "Connection aborted" in str(e) or "RemoteDisconnected" in str(e):
                     self.logger.debug(f"美股实时接口网络异常: {e}")
@@ -464,39 +981,14 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
         try:
             financial_indicators = {}
             
-            try:
-                # 利润表数据
-                income_statement = ak.stock_financial_abstract_ths(symbol=stock_code, indicator="按报告期")
-                if not income_statement.empty:
-                    latest_income = income_statement.iloc[0].to_dict()
-                    financial_indicators.update(latest_income)
-            except Exception as e:
-                self.logger.warning(f"获取利润表数据失败: {e}")
-            
-            try:
-                # 财务分析指标
-                balance_sheet = ak.stock_financial_analysis_indicator(symbol=stock_code)
-                if not balance_sheet.empty:
-                    latest_balance = balance_sheet.iloc[-1].to_dict()
-                    financial_indicators.update(latest_balance)
-            except Exception as e:
-                self.logger.warning(f"获取财务分析指标失败: {e}")
-            
-            try:
-                # 现金流量表
-                cash_flow_stock_code=stock_code
-                if stock_code.startswith(('00', '30')):
-                    #"深圳证券交易所"
-                    cash_flow_stock_code="sz"+stock_code
-                elif stock_code.startswith(('60', '68')):
-                    #"上海证券交易所"
-                    cash_flow_stock_code="sh"+stock_code
-                cash_flow = ak.stock_cash_flow_sheet_by_report_em(symbol=cash_flow_stock_code)
-                if not cash_flow.empty:
-                    latest_cash = cash_flow.iloc[-1].to_dict()
-                    financial_indicators.update(latest_cash)
-            except Exception as e:
-                self.logger.warning(f"获取现金流量表失败: {e}")
+            # 按顺序合并各报表的最新一期，后面的同名字段覆盖前面的
+            for name, fetch, row in self._financial_sources(stock_code):
+                try:
+                    data = fetch()
+                    if data is not None and not data.empty:
+                        financial_indicators.update(data.iloc[row].to_dict())
+                except Exception as e:
+                    self.logger.warning(f"获取{name}失败: {e}")
             
             # 清理数据
             return self._clean_financial_data(financial_indicators)
@@ -505,6 +997,32 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
             self.logger.error(f"获取财务指标失败: {e}")
             return {}
     
+    def _financial_sources(self, stock_code: str) -> Tuple[Tuple[str, Callable[[], Optional[pd.DataFrame]], int], ...]:
+        """
+        A股财务指标的各个子数据源
+        
+        Returns:
+            (名称, 获取函数, 最新一期所在行) 元组序列
+        """
+        # 现金流量表接口需要带交易所前缀的代码
+        cash_flow_stock_code = stock_code
+        if stock_code.startswith(('00', '30')):
+            #"深圳证券交易所"
+            cash_flow_stock_code = "sz" + stock_code
+        elif stock_code.startswith(('60', '68')):
+            #"上海证券交易所"
+            cash_flow_stock_code = "sh" + stock_code
+        
+        return (
+            ('利润表数据', lambda: _ak_call('ths', _ak().stock_financial_abstract_ths, symbol=stock_code, indicator="按报告期"), 0),
+            ('财务分析指标', lambda: _ak_call('sina', _ak().stock_financial_analysis_indicator, symbol=stock_code), -1),
+            ('现金流量表', lambda: _cached_hist(
+                f"cash_flow_{cash_flow_stock_code}",
+                lambda since: _ak_call('emweb', _ak().stock_cash_flow_sheet_by_report_em, symbol=cash_flow_stock_code),
+                max_age=24 * 3600
+            ), -1),
+        )
+    
     def get_valuation_metrics(self, stock_code: str, market: str) -> Dict[str, Any]:
         """获取估值指标"""
         if market != 'a_stock':
@@ -517,7 +1035,7 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
             valuation = {}
             
             try:
-                valuation_data = ak.stock_a_indicator_lg(symbol=stock_code)
+                valuation_data = _ak_call('legulegu', _ak().stock_a_indicator_lg, symbol=stock_code)
                 if not valuation_data.empty:
                     latest_valuation = valuation_data.iloc[-1].to_dict()
                     valuation = self._clean_financial_data(latest_valuation)
@@ -539,7 +1057,7 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
             return []
             
         try:
-            performance_forecast = ak.stock_yjbb_em(symbol=stock_code)
+            performance_forecast = _ak_call('datacenter', _ak().stock_yjbb_em, symbol=stock_code)
             if not performance_forecast.empty:
                 return performance_forecast.head(10).to_dict('records')
             return []
@@ -556,7 +1074,7 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
             return []
             
         try:
-            dividend_info = ak.stock_fhpg_em(symbol=stock_code)
+            dividend_info = _ak_call('datacenter', _ak().stock_fhpg_em, symbol=stock_code)
             if not dividend_info.empty:
                 return dividend_info.head(10).to_dict('records')
             return []
@@ -575,7 +1093,13 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
             if market == 'a_stock':
                 # A股行业分析
                 try:
-                    industry_info = ak.stock_board_industry_name_em()
+                    industry_info = _cached_spot(
+                        'stock_board_industry_name_em',
+                        lambda: _ak_call('push2', _ak().stock_board_industry_name_em),
+                        ttl=_INDUSTRY_TTL
+                    )
+                    if industry_info is None:
+                        return industry_data
                     stock_industry = industry_info[industry_info.iloc[:, 0].astype(str).str.contains(stock_code, na=False)]
                     if not stock_industry.empty:
                         industry_data['industry_info'] = stock_industry.iloc[0].to_dict()
@@ -599,20 +1123,34 @@ class AkShareFundamentalDataSource(BaseFundamentalDataSource):
             return {}
     
     def _clean_financial_data(self, data_dict: Dict[str, Any]) -> Dict[str, Any]:
-        """清理财务数据中的NaN值"""
-        cleaned_data = {}
-        for key, value in data_dict.items():
-            if pd.isna(value) or (isinstance(value, float) and (math.isnan(value) or math.isinf(value))):
-                cleaned_data[key] = None
-            else:
-                cleaned_data[key] = value
-        return cleaned_data
+        """清理财务数据中的NaN/Inf值"""
+        if not data_dict:
+            return {}
+        values = pd.Series(data_dict, dtype=object)
+        invalid = values.isna() | values.isin([np.inf, -np.inf])
+        return values.where(~invalid, None).to_dict()
     
     def is_available(self) -> bool:
         """检查数据源是否可用"""
         return AKSHARE_AVAILABLE
 
 
+_NEWS_COL_MAP = {
+    '新闻标题': 'title', '新闻内容': 'content', '发布时间': 'time',
+    '文章来源': 'source', '新闻链接': 'url'
+}
+
+_NEWS_MARKET_NAMES = {'a_stock': 'A股', 'hk_stock': '港股', 'us_stock': '美股'}
+
+
+def _news_df_to_list(news_data: pd.DataFrame) -> List[Dict[str, Any]]:
+    """将akshare新闻DataFrame整表转换为新闻字典列表"""
+    news_df = news_data.rename(columns=_NEWS_COL_MAP)
+    news_df = news_df.reindex(columns=list(_NEWS_COL_MAP.values()), fill_value='')
+    news_df['sentiment'] = 0.0  # 默认中性情绪
+    return news_df.to_dict(orient='records')
+
+
 class AkShareNewsDataSource(BaseNewsDataSource):
     """AkShare新闻数据源"""
     
@@ -626,80 +1164,24 @@ class AkShareNewsDataSource(BaseNewsDataSource):
             self.logger.error("akshare库未安装")
             return []
             
-        try:
-            if market == 'a_stock':
-                return self._get_a_stock_news(stock_code, days)
-            elif market == 'hk_stock':
-                return self._get_hk_stock_news(stock_code, days)
-            elif market == 'us_stock':
-                return self._get_us_stock_news(stock_code, days)
-            else:
-                return []
-                
-        except Exception as e:
-            self.logger.error(f"获取{market} {stock_code}新闻失败: {e}")
+        if market not in _NEWS_MARKET_NAMES:
             return []
+        return self._fetch_news(stock_code, market, days)
     
-    def _get_a_stock_news(self, stock_code: str, days: int) -> List[Dict[str, Any]]:
-        """获取A股新闻"""
-        news_list = []
-        try:
-            # 获取个股新闻
-            news_data = ak.stock_news_em(symbol=stock_code)
-            if news_data is not None and not news_data.empty:
-                for _, row in news_data.iterrows():
-                    news_list.append({
-                        'title': row.get('新闻标题', ''),
-                        'content': row.get('新闻内容', ''),
-                        'time': row.get('发布时间', ''),
-                        'source': row.get('文章来源', ''),
-                        'url': row.get('新闻链接', ''),
-                        'sentiment': 0.0  # 默认中性情绪
-                    })
-        except Exception as e:
-            self.logger.warning(f"获取A股新闻失败: {e}")
-        
-        return news_list
-    
-    def _get_hk_stock_news(self, stock_code: str, days: int) -> List[Dict[str, Any]]:
-        """获取港股新闻"""
-        news_list = []
-        try:
-            # 获取港股新闻
-            news_data = ak.stock_news_em(symbol=stock_code)
-            if news_data is not None and not news_data.empty:
-                for _, row in news_data.iterrows():
-                    news_list.append({
-                        'title': row.get('新闻标题', ''),
-                        'content': row.get('新闻内容', ''),
-                        'time': row.get('发布时间', ''),
-                        'source': row.get('文章来源', ''),
-                        'url': row.get('新闻链接', ''),
-                        'sentiment': 0.0
-                    })
-        except Exception as e:
-            self.logger.warning(f"获取港股新闻失败: {e}")
-        
-        return news_list
-    
-    def _get_us_stock_news(self, stock_code: str, days: int) -> List[Dict[str, Any]]:
-        """获取美股新闻"""
+    def _fetch_news(self, stock_code: str, market: str, days: int) -> List[Dict[str, Any]]:
+        """获取个股新闻（A股/港股/美股共用stock_news_em接口），只保留最近days天"""
         news_list = []
         try:
-            # 获取美股新闻
-            news_data = ak.stock_news_em(symbol=stock_code)
+            news_data = _ak_call('search', _ak().stock_news_em, symbol=stock_code)
             if news_data is not None and not news_data.empty:
-                for _, row in news_data.iterrows():
-                    news_list.append({
-                        'title': row.get('新闻标题', ''),
-                        'content': row.get('新闻内容', ''),
-                        'time': row.get('发布时间', ''),
-                        'source': row.get('文章来源', ''),
-                        'url': row.get('新闻链接', ''),
-                        'sentiment': 0.0
-                    })
+                if '发布时间' in news_data.columns:
+                    # 无法解析的发布时间保留，避免误删新闻
+                    publish_time = pd.to_datetime(news_data['发布时间'], errors='coerce')
+                    cutoff = datetime.now() - timedelta(days=days)
+                    news_data = news_data[publish_time.isna() | (publish_time >= cutoff)]
+                news_list = _news_df_to_list(news_data)
         except Exception as e:
-            self.logger.warning(f"获取美股新闻失败: {e}")
+            self.logger.warning(f"获取{_NEWS_MARKET_NAMES[market]}新闻失败: {e}")
         
         return news_list
     
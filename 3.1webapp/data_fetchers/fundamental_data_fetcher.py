@@ -3,18 +3,38 @@ Fundamental Data Fetcher - Handles fundamental analysis data retrieval
 基本面数据获取器 - 处理基本面分析数据获取
 """
 
+import asyncio
 import logging
+import re
+import threading
+import time
 import pandas as pd
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
+from cachetools import TLRUCache, TTLCache
 from .market_utils import MarketUtils
+from .cache_store import SqliteCache, DEFAULT_CACHE_DIR
 from .data_sources import AkShareFundamentalDataSource, BaseFundamentalDataSource
 
 
 class FundamentalDataFetcher:
     """基本面数据获取器"""
     
+    # 指标分类匹配：估值指标不区分大小写（pe/pb），财务指标区分大小写
+    _VALUATION_RE = re.compile(r'市盈率|pe|市净率|pb|市值', re.IGNORECASE)
+    _FINANCIAL_RE = re.compile(r'营业收入|净利润|ROE|ROA|毛利率|净利率')
+    _INVALID_VALUES = frozenset({'nan', '--'})
+    # 基本信息字段及显示格式
+    _BASIC_FIELDS = (
+        ('股票名称', '股票名称: {}'),
+        ('当前价格', '当前价格: {}'),
+        ('涨跌幅', '涨跌幅: {}%'),
+    )
+    # 数据源获取失败时返回的默认信息字段
+    _PLACEHOLDER_KEYS = frozenset({'数据状态', '市场', '货币', '股票代码'})
+    
     def __init__(self, config: Dict[str, Any]):
         """
         初始化基本面数据获取器
@@ -28,7 +48,22 @@ class FundamentalDataFetcher:
         # 缓存配置
         cache_config = config.get('cache', {})
         self.fundamental_cache_duration = timedelta(hours=cache_config.get('fundamental_hours', 6))
-        self.fundamental_cache = {}
+        # 内存LRU缓存（容量有上限），后面是持久化缓存，进程重启后仍可命中。
+        # 条目为(过期时刻, 数据)，从磁盘提升的条目只保留磁盘上剩余的有效期
+        self.fundamental_cache = TLRUCache(
+            maxsize=cache_config.get('fundamental_max_entries', 10000),
+            ttu=lambda _key, entry, _now: entry[0],
+            timer=time.monotonic
+        )
+        self._cache_lock = threading.RLock()
+        self.cache = SqliteCache(DEFAULT_CACHE_DIR / 'fundamental.db')
+        # 失败结果短时缓存，避免对失败的股票反复请求、反复等待超时
+        self.fundamental_negative_cache_duration = timedelta(minutes=cache_config.get('negative_minutes', 2))
+        # 容量有上限，大量股票失败时也不会无限增长；与内存缓存共用_cache_lock
+        self._negative_cache = TTLCache(
+            maxsize=cache_config.get('negative_max_entries', 1024),
+            ttl=self.fundamental_negative_cache_duration.total_seconds()
+        )
         
         # 分析参数
         params = config.get('analysis_params', {})
@@ -37,6 +72,13 @@ class FundamentalDataFetcher:
         # 初始化数据源
         self.data_sources = self._initialize_data_sources()
         
+        # 线程池执行阻塞的数据源调用（同步与异步接口共用）
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fundamental")
+        
+        # 同一股票的并发请求只由第一个调用方真正获取，其余等待同一个Future
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
     def _initialize_data_sources(self) -> List[BaseFundamentalDataSource]:
         """初始化数据源列表"""
         sources = []
@@ -61,6 +103,22 @@ class FundamentalDataFetcher:
                 return source
         return None
     
+    def get_stock_info(self, stock_code: str, market: str) -> Dict[str, Any]:
+        """
+        获取股票基本信息（港股/美股走数据源的全市场快照缓存）
+        
+        Args:
+            stock_code: 已标准化的股票代码
+            market: 市场类型
+            
+        Returns:
+            Dict: 基本信息，无可用数据源时返回空字典
+        """
+        source = self._get_available_source()
+        if not source:
+            return {}
+        return source.get_stock_info(stock_code, market)
+    
     def get_comprehensive_fundamental_data(self, stock_code: str) -> Dict[str, Any]:
         """
         获取综合基本面数据
@@ -75,13 +133,38 @@ class FundamentalDataFetcher:
         cache_key = f"fundamental_{market}_{stock_code}"
         
         # 检查缓存
-        if cache_key in self.fundamental_cache:
-            cache_time, data = self.fundamental_cache[cache_key]
-            if datetime.now() - cache_time < self.fundamental_cache_duration:
-                self.logger.info(f"使用缓存的基本面数据: {cache_key}")
-                return data
+        data = self._get_cached_fundamental_data(cache_key)
+        if data is not None:
+            return data
+        
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
         
-        self.logger.info(f"正在获取 {market.upper()} {stock_code} 的基本面数据...")
+        if not is_owner:
+            self.logger.info("等待进行中的基本面数据请求: %s", cache_key)
+            return future.result()
+        
+        try:
+            # 检查缓存与成为owner之间，上一个owner可能刚好获取完成并写入缓存，获取前再查一次
+            fundamental_data = self._get_cached_fundamental_data(cache_key)
+            if fundamental_data is None:
+                fundamental_data = self._fetch_fundamental_data(stock_code, market, cache_key)
+            future.set_result(fundamental_data)
+            return fundamental_data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+    
+    def _fetch_fundamental_data(self, stock_code: str, market: str, cache_key: str) -> Dict[str, Any]:
+        """从数据源获取基本面数据并写入缓存"""
+        self.logger.info("正在获取 %s %s 的基本面数据...", market.upper(), stock_code)
         
         # 获取可用的数据源
         source = self._get_available_source()
@@ -90,31 +173,183 @@ class FundamentalDataFetcher:
             return {}
         
         try:
-            # 使用数据源获取数据
-            fundamental_data = {}
+            # 基本信息、财务指标、估值指标互不依赖，在线程池中并发获取
+            calls = (source.get_stock_info, source.get_financial_indicators, source.get_valuation_metrics)
+            futures = [self._executor.submit(call, stock_code, market) for call in calls]
             
-            # 获取基本信息
-            stock_info = source.get_stock_info(stock_code, market)
-            fundamental_data.update(stock_info)
-            
-            # 获取财务指标
-            financial_indicators = source.get_financial_indicators(stock_code, market)
-            fundamental_data.update(financial_indicators)
+            # 按固定顺序合并，后面的指标覆盖前面的同名字段
+            fundamental_data = {}
+            for call, future in zip(calls, futures):
+                try:
+                    fundamental_data.update(future.result())
+                except Exception as e:
+                    self.logger.warning("%s 获取 %s 失败: %s", call.__name__, stock_code, e)
             
-            # 获取估值指标
-            valuation_metrics = source.get_valuation_metrics(stock_code, market)
-            fundamental_data.update(valuation_metrics)
+            self._cache_fundamental_data(cache_key, fundamental_data)
+            return fundamental_data
             
-            # 缓存数据
-            if fundamental_data:
-                self.fundamental_cache[cache_key] = (datetime.now(), fundamental_data)
-                self.logger.info(f"成功获取基本面数据，包含 {len(fundamental_data)} 个指标")
+        except Exception as e:
+            self.logger.error("获取 %s 基本面数据时发生错误: %s", stock_code, e)
+            with self._cache_lock:
+                self._negative_cache[cache_key] = True
+            return {}
+    
+    async def get_comprehensive_fundamental_data_async(self, stock_code: str) -> Dict[str, Any]:
+        """
+        异步获取综合基本面数据，基本信息、财务指标、估值指标三个请求并发执行
+        
+        Args:
+            stock_code: 股票代码
             
+        Returns:
+            Dict[str, Any]: 基本面数据字典
+        """
+        stock_code, market = MarketUtils.normalize_stock_code(stock_code)
+        cache_key = f"fundamental_{market}_{stock_code}"
+        
+        data = self._get_cached_fundamental_data(cache_key)
+        if data is not None:
+            return data
+        
+        # 与同步接口共用进行中请求表，同步/异步调用方都只等待同一次获取
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
+        
+        if not is_owner:
+            self.logger.info("等待进行中的基本面数据请求: %s", cache_key)
+            return await asyncio.wrap_future(future)
+        
+        try:
+            # 成为owner前可能已有请求完成并写入缓存，获取前再查一次
+            fundamental_data = self._get_cached_fundamental_data(cache_key)
+            if fundamental_data is None:
+                fundamental_data = await self._fetch_fundamental_data_async(stock_code, market, cache_key)
+            future.set_result(fundamental_data)
             return fundamental_data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+    
+    async def _fetch_fundamental_data_async(self, stock_code: str, market: str, cache_key: str) -> Dict[str, Any]:
+        """并发调用数据源的三个接口获取基本面数据并写入缓存"""
+        self.logger.info("正在获取 %s %s 的基本面数据...", market.upper(), stock_code)
+        
+        source = self._get_available_source()
+        if not source:
+            self.logger.error("没有可用的基本面数据源")
+            return {}
+        
+        # 三个接口互不依赖，耗时由总和变为最大值；接口限流由数据源内部负责
+        loop = asyncio.get_running_loop()
+        calls = (source.get_stock_info, source.get_financial_indicators, source.get_valuation_metrics)
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, call, stock_code, market) for call in calls),
+            return_exceptions=True
+        )
+        
+        # 按固定顺序合并，与同步接口的覆盖顺序一致
+        fundamental_data = {}
+        for call, result in zip(calls, results):
+            if isinstance(result, Exception):
+                self.logger.warning("%s 获取 %s 失败: %s", call.__name__, stock_code, result)
+                continue
+            fundamental_data.update(result)
+        
+        self._cache_fundamental_data(cache_key, fundamental_data)
+        return fundamental_data
+    
+    async def get_comprehensive_fundamental_data_batch(self, stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量异步获取多只股票的基本面数据
+        
+        Args:
+            stock_codes: 股票代码列表
             
-        except Exception as e:
-            self.logger.error(f"获取 {stock_code} 基本面数据时发生错误: {e}")
+        Returns:
+            Dict[str, Dict[str, Any]]: 股票代码到基本面数据的映射
+        """
+        semaphore = asyncio.Semaphore(self.config.get('concurrency', 8))
+        
+        async def fetch_one(code: str):
+            async with semaphore:
+                try:
+                    return code, await self.get_comprehensive_fundamental_data_async(code)
+                except Exception as e:
+                    self.logger.error("获取 %s 基本面数据时发生错误: %s", code, e)
+                    return code, {}
+        
+        # 重复代码只请求一次；港股/美股快照由数据源缓存，多只股票共用一次下载
+        unique_codes = list(dict.fromkeys(stock_codes))
+        results = await asyncio.gather(*(fetch_one(code) for code in unique_codes))
+        return dict(results)
+    
+    def invalidate(self, stock_code: str) -> None:
+        """
+        使某只股票的基本面缓存失效（内存、磁盘及失败缓存），下次请求重新获取
+        
+        Args:
+            stock_code: 股票代码
+        """
+        stock_code, market = MarketUtils.normalize_stock_code(stock_code)
+        cache_key = f"fundamental_{market}_{stock_code}"
+        with self._cache_lock:
+            self.fundamental_cache.pop(cache_key, None)
+            self._negative_cache.pop(cache_key, None)
+        self.cache.delete(cache_key)
+        self.logger.info("已清除基本面缓存: %s", cache_key)
+    
+    def _get_cached_fundamental_data(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存
+        
+        Returns:
+            缓存的数据；最近获取失败时返回空字典；未命中返回None
+        """
+        with self._cache_lock:
+            entry = self.fundamental_cache.get(cache_key)
+        data = entry[1] if entry is not None else None
+        if data is None:
+            disk_entry = self.cache.get_entry(cache_key)
+            if disk_entry is not None:
+                data, remaining = disk_entry
+                with self._cache_lock:
+                    self.fundamental_cache[cache_key] = (time.monotonic() + remaining, data)
+        if data is not None:
+            self.logger.info("使用缓存的基本面数据: %s", cache_key)
+            return data
+        
+        with self._cache_lock:
+            recently_failed = self._negative_cache.get(cache_key, False)
+        if recently_failed:
+            self.logger.info("%s 最近获取失败，暂不重试", cache_key)
             return {}
+        return None
+    
+    def _cache_fundamental_data(self, cache_key: str, fundamental_data: Dict[str, Any]) -> None:
+        """缓存基本面数据；所有接口都没有返回数据时记入失败缓存"""
+        if fundamental_data:
+            ttl = self.fundamental_cache_duration.total_seconds()
+            with self._cache_lock:
+                self.fundamental_cache[cache_key] = (time.monotonic() + ttl, fundamental_data)
+            self.cache.set(cache_key, fundamental_data, ttl=ttl)
+            self.logger.info("成功获取基本面数据，包含 %s 个指标", len(fundamental_data))
+        else:
+            with self._cache_lock:
+                self._negative_cache[cache_key] = True
+    
+    @staticmethod
+    def _is_valid(value: Any) -> bool:
+        """有效的指标值：非空、非NaN，且不是'nan'/'--'占位符"""
+        if not value or value != value:  # value != value 即NaN
+            return False
+        return not (isinstance(value, str) and value in FundamentalDataFetcher._INVALID_VALUES)
     
     def format_fundamental_data(self, data: Dict[str, Any]) -> str:
         """
@@ -129,57 +364,49 @@ class FundamentalDataFetcher:
         if not data:
             return "无基本面数据"
         
+        # 只有默认占位信息时不会命中任何指标分类，直接输出
+        if '数据状态' in data and data.keys() <= self._PLACEHOLDER_KEYS:
+            other_metrics = [f"{key}: {value}" for key, value in data.items() if self._is_valid(value)]
+            if not other_metrics:
+                return "基本面数据处理中..."
+            return "\n".join(["其他指标:"] + other_metrics[:self.financial_indicators_count])
+        
         formatted_lines = []
         
         # 基本信息
-        basic_info = []
-        if '股票名称' in data:
-            basic_info.append(f"股票名称: {data['股票名称']}")
-        if '当前价格' in data:
-            basic_info.append(f"当前价格: {data['当前价格']}")
-        if '涨跌幅' in data:
-            basic_info.append(f"涨跌幅: {data['涨跌幅']}%")
+        basic_info = [fmt.format(data[key]) for key, fmt in self._BASIC_FIELDS if key in data]
         
         if basic_info:
             formatted_lines.extend(basic_info)
             formatted_lines.append("")
         
-        # 估值指标
+        # 一次遍历把各指标分到估值/财务/其他三个列表
         valuation_metrics = []
+        financial_metrics = []
+        other_metrics = []
         for key, value in data.items():
-            if any(metric in key.lower() for metric in ['市盈率', 'pe', '市净率', 'pb', '市值']):
-                if value and str(value) != 'nan' and str(value) != '--':
-                    valuation_metrics.append(f"{key}: {value}")
+            if not self._is_valid(value):
+                continue
+            line = f"{key}: {value}"
+            if self._VALUATION_RE.search(key):
+                valuation_metrics.append(line)
+            if self._FINANCIAL_RE.search(key):
+                financial_metrics.append(line)
+            if len(other_metrics) < self.financial_indicators_count:
+                other_metrics.append(line)
         
         if valuation_metrics:
             formatted_lines.append("估值指标:")
             formatted_lines.extend(valuation_metrics[:8])  # 限制显示数量
             formatted_lines.append("")
         
-        # 财务指标
-        financial_metrics = []
-        for key, value in data.items():
-            if any(metric in key for metric in ['营业收入', '净利润', 'ROE', 'ROA', '毛利率', '净利率']):
-                if value and str(value) != 'nan' and str(value) != '--':
-                    financial_metrics.append(f"{key}: {value}")
-        
         if financial_metrics:
             formatted_lines.append("财务指标:")
             formatted_lines.extend(financial_metrics[:10])  # 限制显示数量
         
         # 如果没有找到特定指标，显示前N个非空数据
-        if len(formatted_lines) < 5:
-            other_metrics = []
-            count = 0
-            for key, value in data.items():
-                if count >= self.financial_indicators_count:
-                    break
-                if value and str(value) != 'nan' and str(value) != '--':
-                    other_metrics.append(f"{key}: {value}")
-                    count += 1
-            
-            if other_metrics:
-                formatted_lines.append("其他指标:")
-                formatted_lines.extend(other_metrics)
+        if len(formatted_lines) < 5 and other_metrics:
+            formatted_lines.append("其他指标:")
+            formatted_lines.extend(other_metrics)
         
         return "\n".join(formatted_lines) if formatted_lines else "基本面数据处理中..."
\ No newline at end of file
@@ -3,13 +3,30 @@ Market Utilities - Stock code normalization and market detection
 市场工具类 - 股票代码规范化和市场识别
 """
 
+import functools
 import re
 import logging
-from typing import Tuple
+from typing import List, Tuple
 
 class MarketUtils:
     """市场工具类"""
     
+    # 美股代码：1-5位字母
+    _US_TICKER_RE = re.compile(r'[A-Z]{1,5}')
+    # 港股代码的首位数字
+    _HK_LEADING_DIGITS = frozenset('0123689')
+    
+    @staticmethod
+    def _format_a_stock_code(stock_code: str, notes: List[Tuple[int, str]]) -> str:
+        """A股代码补齐/截断为6位"""
+        if len(stock_code) < 6:
+            return stock_code.zfill(6)
+        if len(stock_code) > 6:
+            # 超过6位，可能是错误输入
+            notes.append((logging.WARNING, f"A股代码长度异常: {stock_code}"))
+            return stock_code[:6]
+        return stock_code
+    
     @staticmethod
     def normalize_stock_code(stock_code: str) -> Tuple[str, str]:
         """
@@ -21,66 +38,70 @@ class MarketUtils:
         Returns:
             Tuple[str, str]: (标准化后的代码, 市场类型)
         """
+        stock_code, market, notes = MarketUtils._classify_stock_code(stock_code)
+        # 识别结果按输入缓存，日志在缓存之外输出，每次调用都保留诊断信息
         logger = logging.getLogger(__name__)
+        for level, message in notes:
+            logger.log(level, message)
+        return stock_code, market
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _classify_stock_code(stock_code: str) -> Tuple[str, str, Tuple[Tuple[int, str], ...]]:
+        """识别市场并标准化代码（结果只取决于输入，按输入缓存），同时返回待输出的日志"""
+        notes: List[Tuple[int, str]] = []
         
         # 移除空格并转换为大写
         stock_code = stock_code.strip().upper()
         
         # 美股识别
-        if re.match(r'^[A-Z]{1,5}$', stock_code) and not stock_code.isdigit():
-            logger.info(f"识别为美股: {stock_code}")
-            return stock_code, 'us_stock'
+        if MarketUtils._US_TICKER_RE.fullmatch(stock_code):
+            notes.append((logging.INFO, f"识别为美股: {stock_code}"))
+            return stock_code, 'us_stock', tuple(notes)
         
         # 港股识别 - 数字开头，通常4-5位
-        if stock_code.isdigit() and (4 <= len(stock_code) <= 5):
-            if stock_code.startswith(('0', '1', '2', '3', '6', '8', '9')):
-                logger.info(f"识别为港股: {stock_code}")
-                return stock_code, 'hk_stock'
+        is_digit = stock_code.isdigit()
+        if is_digit and 4 <= len(stock_code) <= 5 and stock_code[0] in MarketUtils._HK_LEADING_DIGITS:
+            notes.append((logging.INFO, f"识别为港股: {stock_code}"))
+            return stock_code, 'hk_stock', tuple(notes)
         
         # A股识别和格式化
-        if stock_code.isdigit():
-            if len(stock_code) < 6:
-                stock_code = stock_code.zfill(6)
-            elif len(stock_code) == 6:
-                pass  # 已经是6位
-            else:
-                # 超过6位，可能是错误输入
-                logger.warning(f"A股代码长度异常: {stock_code}")
-                stock_code = stock_code[:6]
+        if is_digit:
+            stock_code = MarketUtils._format_a_stock_code(stock_code, notes)
             
             # 验证A股代码格式
             if stock_code.startswith(('00', '30')):  # 深圳
-                logger.info(f"识别为深圳A股: {stock_code}")
-                return stock_code, 'a_stock'
+                notes.append((logging.INFO, f"识别为深圳A股: {stock_code}"))
             elif stock_code.startswith('60'):  # 上海
-                logger.info(f"识别为上海A股: {stock_code}")
-                return stock_code, 'a_stock'
+                notes.append((logging.INFO, f"识别为上海A股: {stock_code}"))
             else:
-                logger.warning(f"未识别的A股代码模式: {stock_code}")
-                return stock_code, 'a_stock'  # 默认为A股
+                notes.append((logging.WARNING, f"未识别的A股代码模式: {stock_code}"))
+            return stock_code, 'a_stock', tuple(notes)  # 默认为A股
         
         # 带后缀的情况处理
         if '.' in stock_code:
             code_part, suffix = stock_code.split('.', 1)
             suffix = suffix.upper()
             
-            if suffix in ['SZ', 'SS']:  # A股
-                return MarketUtils.normalize_stock_code(code_part)[0], 'a_stock'
+            if suffix in ('SZ', 'SS'):  # A股
+                if code_part.isdigit():
+                    code_part = MarketUtils._format_a_stock_code(code_part, notes)
+                return code_part, 'a_stock', tuple(notes)
             elif suffix == 'HK':  # 港股
-                return code_part, 'hk_stock'
+                return code_part, 'hk_stock', tuple(notes)
             else:  # 其他后缀，可能是美股
-                return stock_code, 'us_stock'
+                return stock_code, 'us_stock', tuple(notes)
         
         # 默认情况 - 如果是纯数字且长度合适，按A股处理
         if stock_code.isdigit():
             if len(stock_code) < 5:
                 stock_code = stock_code.zfill(6)
-            logger.info(f"默认识别为A股: {stock_code}")
-            return stock_code, 'a_stock'
+            notes.append((logging.INFO, f"默认识别为A股: {stock_code}"))
+            return stock_code, 'a_stock', tuple(notes)
         
         # 其他情况默认为美股
-        logger.info(f"默认识别为美股: {stock_code}")
-        return stock_code, 'us_stock'
+        notes.append((logging.INFO, f"默认识别为美股: {stock_code}"))
+        return stock_code, 'us_stock', tuple(notes)
 
     @staticmethod
     def get_market_info(market: str) -> dict:
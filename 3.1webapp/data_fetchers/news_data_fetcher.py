@@ -4,11 +4,16 @@ News Data Fetcher - Handles news and sentiment data retrieval
 """
 
 import logging
+import threading
+import time
 import pandas as pd
 import numpy as np
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
+from cachetools import TLRUCache
 from .market_utils import MarketUtils
+from .cache_store import SqliteCache, DEFAULT_CACHE_DIR
 from .data_sources import AkShareNewsDataSource, BaseNewsDataSource
 
 
@@ -28,7 +33,16 @@ class NewsDataFetcher:
         # 缓存配置
         cache_config = config.get('cache', {})
         self.news_cache_duration = timedelta(hours=cache_config.get('news_hours', 2))
-        self.news_cache = {}
+        # LRU缓存，容量有上限，避免长期运行时无限增长。
+        # 条目为(过期时刻, 数据)，从磁盘提升的条目只保留磁盘上剩余的有效期
+        self.news_cache = TLRUCache(
+            maxsize=cache_config.get('news_max_entries', 512),
+            ttu=lambda _key, entry, _now: entry[0],
+            timer=time.monotonic
+        )
+        self._cache_lock = threading.RLock()
+        # 持久化缓存，进程重启后仍可命中，避免冷启动时集中请求接口
+        self.cache = SqliteCache(DEFAULT_CACHE_DIR / 'news.db')
         
         # 分析参数
         params = config.get('analysis_params', {})
@@ -37,6 +51,10 @@ class NewsDataFetcher:
         # 初始化数据源
         self.data_sources = self._initialize_data_sources()
         
+        # 同一股票的并发请求只由第一个调用方真正获取，其余等待同一个Future
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
     def _initialize_data_sources(self) -> List[BaseNewsDataSource]:
         """初始化数据源列表"""
         sources = []
@@ -76,13 +94,38 @@ class NewsDataFetcher:
         cache_key = f"news_{market}_{stock_code}_{days}"
         
         # 检查缓存
-        if cache_key in self.news_cache:
-            cache_time, data = self.news_cache[cache_key]
-            if datetime.now() - cache_time < self.news_cache_duration:
-                self.logger.info(f"使用缓存的新闻数据: {cache_key}")
-                return data
+        data = self._get_cached_news_data(cache_key)
+        if data is not None:
+            return data
+        
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
         
-        self.logger.info(f"正在获取 {market.upper()} {stock_code} 的新闻数据 (过去{days}天)...")
+        if not is_owner:
+            self.logger.info("等待进行中的新闻数据请求: %s", cache_key)
+            return future.result()
+        
+        try:
+            # 检查缓存与成为owner之间，上一个owner可能刚好获取完成并写入缓存，获取前再查一次
+            news_data = self._get_cached_news_data(cache_key)
+            if news_data is None:
+                news_data = self._fetch_news_data(stock_code, market, days, cache_key)
+            future.set_result(news_data)
+            return news_data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+    
+    def _fetch_news_data(self, stock_code: str, market: str, days: int, cache_key: str) -> Dict[str, Any]:
+        """从数据源获取新闻数据并写入缓存"""
+        self.logger.info("正在获取 %s %s 的新闻数据 (过去%s天)...", market.upper(), stock_code, days)
         
         # 获取可用的数据源
         source = self._get_available_source()
@@ -102,15 +145,33 @@ class NewsDataFetcher:
             
             # 缓存数据
             if news_data and news_data.get('news'):
-                self.news_cache[cache_key] = (datetime.now(), news_data)
-                self.logger.info(f"成功获取 {len(news_data.get('news', []))} 条新闻")
+                ttl = self.news_cache_duration.total_seconds()
+                with self._cache_lock:
+                    self.news_cache[cache_key] = (time.monotonic() + ttl, news_data)
+                self.cache.set(cache_key, news_data, ttl=ttl)
+                self.logger.info("成功获取 %s 条新闻", len(news_data.get('news', [])))
             
             return news_data
             
         except Exception as e:
-            self.logger.error(f"获取 {stock_code} 新闻数据时发生错误: {e}")
+            self.logger.error("获取 %s 新闻数据时发生错误: %s", stock_code, e)
             return {'news': [], 'sentiment': {}}
     
+    def _get_cached_news_data(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """查询内存缓存，未命中再查磁盘缓存；都未命中返回None"""
+        with self._cache_lock:
+            entry = self.news_cache.get(cache_key)
+        data = entry[1] if entry is not None else None
+        if data is None:
+            disk_entry = self.cache.get_entry(cache_key)
+            if disk_entry is not None:
+                data, remaining = disk_entry
+                with self._cache_lock:
+                    self.news_cache[cache_key] = (time.monotonic() + remaining, data)
+        if data is not None:
+            self.logger.info("使用缓存的新闻数据: %s", cache_key)
+        return data
+    
     def _calculate_basic_sentiment(self, news_list: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         计算基础情绪分析
@@ -131,8 +192,8 @@ class NewsDataFetcher:
         
         try:
             # 计算平均情绪
-            sentiments = [news.get('sentiment', 0.0) for news in news_list if 'sentiment' in news]
-            overall_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0.0
+            sentiments = np.fromiter((news['sentiment'] for news in news_list if 'sentiment' in news), dtype=np.float64)
+            overall_sentiment = float(sentiments.mean()) if sentiments.size else 0.0
             
             # 情绪趋势
             if overall_sentiment > 0.1:
@@ -153,7 +214,7 @@ class NewsDataFetcher:
             }
             
         except Exception as e:
-            self.logger.error(f"计算情绪分析失败: {e}")
+            self.logger.error("计算情绪分析失败: %s", e)
             return {
                 'overall_sentiment': 0.0,
                 'sentiment_trend': '中性',
@@ -3,18 +3,76 @@ Price Data Fetcher - Handles stock price data retrieval from multiple markets
 价格数据获取器 - 处理多市场股票价格数据获取
 """
 
+import asyncio
 import logging
+import threading
+import time
 import pandas as pd
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from cachetools import TTLCache
 from .market_utils import MarketUtils
-from .data_sources import AkSharePriceDataSource, BasePriceDataSource
+from .data_sources import AkShareAsyncPriceDataSource, BasePriceDataSource
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _price_info_kernel(closes, volumes):
+    """
+    计算(最新价, 涨跌幅%, 量比, 波动)，单次遍历最近20个成交量
+
+    volumes长度与closes不一致（如没有成交量列时传入空数组）时量比固定为1.0
+    """
+    n = closes.shape[0]
+    current_price = closes[n - 1]
+    
+    price_change = 0.0
+    if n > 1:
+        prev_price = closes[n - 2]
+        if prev_price != 0:
+            price_change = (current_price - prev_price) / prev_price * 100.0
+    
+    # 量比：最新成交量 / 近20日平均成交量（忽略NaN）
+    volume_ratio = 1.0
+    if n >= 20 and volumes.shape[0] == n:
+        total = 0.0
+        count = 0
+        for i in range(n - 20, n):
+            v = volumes[i]
+            if v == v:
+                total += v
+                count += 1
+        if count > 0 and total > 0:
+            current_volume = volumes[n - 1]
+            if current_volume != current_volume:
+                current_volume = 0.0
+            volume_ratio = current_volume / (total / count)
+    
+    return current_price, price_change, volume_ratio, abs(price_change)
+
+
+if NUMBA_AVAILABLE:
+    # nogil便于线程池批量扫描时并行执行
+    _price_info_kernel = njit(cache=True, nogil=True)(_price_info_kernel)
+
+_EMPTY_VOLUMES = np.empty(0, dtype=np.float64)
+
+# 价格缓存键：(市场, 标准化代码, 时间周期)，元组哈希比拼接字符串更省
+PriceCacheKey = Tuple[str, str, str]
 
 
 class PriceDataFetcher:
     """股票价格数据获取器"""
     
+    # 选中的数据源复用时长（秒），超时或获取失败后重新探测
+    _SOURCE_RECHECK_SECONDS = 60.0
+    
     def __init__(self, config: Dict[str, Any]):
         """
         初始化价格数据获取器
@@ -28,21 +86,36 @@ class PriceDataFetcher:
         # 缓存配置
         cache_config = config.get('cache', {})
         self.cache_duration = timedelta(hours=cache_config.get('price_hours', 1))
-        self.price_cache = {}
+        # LRU+TTL缓存，容量有上限，避免长期运行时无限增长
+        self.price_cache = TTLCache(
+            maxsize=cache_config.get('price_max_entries', 512),
+            ttl=self.cache_duration.total_seconds()
+        )
+        self._cache_lock = threading.RLock()
         
         # 分析参数
         params = config.get('analysis_params', {})
         self.technical_period_days = params.get('technical_period_days', 180)
         
+        # 批量获取共用的线程池，数据源也复用这一个线程池
+        concurrency = config.get('concurrency', 8)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="price")
+        
         # 初始化数据源
         self.data_sources = self._initialize_data_sources()
+        self._primary_source: Optional[BasePriceDataSource] = None
+        self._primary_checked_at = 0.0
+        
+        # 同一股票的并发请求只由第一个调用方真正获取，其余等待同一个Future
+        self._inflight: Dict[PriceCacheKey, Future] = {}
+        self._inflight_lock = threading.Lock()
         
     def _initialize_data_sources(self) -> List[BasePriceDataSource]:
         """初始化数据源列表"""
         sources = []
         
-        # 添加AkShare数据源
-        akshare_source = AkSharePriceDataSource()
+        # 添加AkShare数据源：单只股票走同步接口，批量获取时用aiohttp连接池直连K线接口
+        akshare_source = AkShareAsyncPriceDataSource(executor=self._executor)
         if akshare_source.is_available():
             sources.append(akshare_source)
             self.logger.info("已加载AkShare价格数据源")
@@ -55,10 +128,18 @@ class PriceDataFetcher:
         return sources
     
     def _get_available_source(self) -> Optional[BasePriceDataSource]:
-        """获取可用的数据源"""
+        """获取可用的数据源（复用上次选中的数据源，不必每次请求都探测）"""
+        now = time.monotonic()
+        source = self._primary_source
+        if source is not None and now - self._primary_checked_at < self._SOURCE_RECHECK_SECONDS:
+            return source
+        
         for source in self.data_sources:
             if source.is_available():
+                self._primary_source = source
+                self._primary_checked_at = now
                 return source
+        self._primary_source = None
         return None
     
     def get_stock_data(self, stock_code: str, period: str = '1y') -> Optional[pd.DataFrame]:
@@ -73,16 +154,41 @@ class PriceDataFetcher:
             pd.DataFrame: 股票价格数据
         """
         stock_code, market = MarketUtils.normalize_stock_code(stock_code)
-        cache_key = f"{market}_{stock_code}_{period}"
+        cache_key = (market, stock_code, period)
         
         # 检查缓存
-        if cache_key in self.price_cache:
-            cache_time, data = self.price_cache[cache_key]
-            if datetime.now() - cache_time < self.cache_duration:
-                self.logger.info(f"使用缓存的价格数据: {cache_key}")
-                return data
+        data = self._get_cached_price_data(cache_key)
+        if data is not None:
+            return data
+        
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
         
-        self.logger.info(f"正在获取 {market.upper()} {stock_code} 的历史数据 (过去{self.technical_period_days}天)...")
+        if not is_owner:
+            self.logger.info("等待进行中的价格数据请求: %s", cache_key)
+            return future.result()
+        
+        try:
+            # 检查缓存与成为owner之间，上一个owner可能刚好获取完成并写入缓存，获取前再查一次
+            stock_data = self._get_cached_price_data(cache_key)
+            if stock_data is None:
+                stock_data = self._fetch_stock_data(stock_code, market, period, cache_key)
+            future.set_result(stock_data)
+            return stock_data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+    
+    def _fetch_stock_data(self, stock_code: str, market: str, period: str, cache_key: PriceCacheKey) -> Optional[pd.DataFrame]:
+        """从数据源获取价格数据并写入缓存"""
+        self.logger.info("正在获取 %s %s 的历史数据 (过去%s天)...", market.upper(), stock_code, self.technical_period_days)
         
         # 获取可用的数据源
         source = self._get_available_source()
@@ -96,17 +202,153 @@ class PriceDataFetcher:
             
             if stock_data is not None and not stock_data.empty:
                 # 缓存数据
-                self.price_cache[cache_key] = (datetime.now(), stock_data)
-                self.logger.info(f"成功获取 {len(stock_data)} 条价格数据")
+                self._store_price_data(cache_key, stock_data)
+                self.logger.info("成功获取 %s 条价格数据", len(stock_data))
                 return stock_data
             else:
-                self.logger.warning(f"获取 {stock_code} 价格数据为空")
+                self.logger.warning("获取 %s 价格数据为空", stock_code)
                 return None
                 
         except Exception as e:
-            self.logger.error(f"获取 {market} {stock_code} 价格数据时发生错误: {e}")
+            # 数据源出错后下次请求重新探测
+            self._primary_source = None
+            self.logger.error("获取 %s %s 价格数据时发生错误: %s", market, stock_code, e)
             return None
     
+    def get_stock_data_batch(self, stock_codes: List[str], period: str = '1y') -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        批量获取多只股票的价格数据（线程池并发，可混合不同市场）
+        
+        Args:
+            stock_codes: 股票代码列表
+            period: 时间周期
+            
+        Returns:
+            Dict[str, DataFrame]: 股票代码到价格数据的映射，获取失败的为None
+        """
+        stock_data = {}
+        futures = {}
+        # 重复代码只请求一次；缓存命中的直接返回，不占用线程池
+        for code in dict.fromkeys(stock_codes):
+            normalized_code, market = MarketUtils.normalize_stock_code(code)
+            data = self._get_cached_price_data((market, normalized_code, period))
+            if data is not None:
+                stock_data[code] = data
+            else:
+                futures[self._executor.submit(self.get_stock_data, code, period)] = code
+        
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                stock_data[code] = future.result()
+            except Exception as e:
+                self.logger.error("批量获取 %s 价格数据时发生错误: %s", code, e)
+                stock_data[code] = None
+        return stock_data
+    
+    async def get_stock_data_batch_async(self, stock_codes: List[str], period: str = '1y') -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        批量异步获取多只股票的价格数据
+        
+        Args:
+            stock_codes: 股票代码列表
+            period: 时间周期
+            
+        Returns:
+            Dict[str, DataFrame]: 股票代码到价格数据的映射，获取失败的为None
+        """
+        stock_data = {}
+        # 缓存未命中的股票按市场分组，每个市场一次批量请求
+        pending: Dict[str, List[Tuple[str, str]]] = {}
+        for code in dict.fromkeys(stock_codes):
+            normalized_code, market = MarketUtils.normalize_stock_code(code)
+            data = self._get_cached_price_data((market, normalized_code, period))
+            if data is not None:
+                stock_data[code] = data
+            else:
+                pending.setdefault(market, []).append((code, normalized_code))
+        
+        if pending:
+            results = await asyncio.gather(
+                *(self._fetch_market_batch_async(items, market, period) for market, items in pending.items())
+            )
+            for market_data in results:
+                stock_data.update(market_data)
+        return stock_data
+    
+    async def _fetch_market_batch_async(self, items: List[Tuple[str, str]], market: str,
+                                        period: str) -> Dict[str, Optional[pd.DataFrame]]:
+        """批量获取同一市场的价格数据，批量接口整体失败时逐只回退到同步获取"""
+        fetched = {}
+        # 数据源支持批量接口时一批股票共用一个keep-alive会话，否则全部逐只获取
+        source = self._get_available_source()
+        get_many = getattr(source, 'get_stock_data_many', None)
+        if get_many is not None:
+            try:
+                fetched = await get_many(
+                    list(dict.fromkeys(normalized for _, normalized in items)), market, period
+                )
+            except Exception as e:
+                self.logger.warning("批量获取 %s 价格数据失败，逐只回退: %s", market, e)
+        
+        stock_data = {}
+        fallback_codes = []
+        for code, normalized_code in items:
+            if normalized_code not in fetched:
+                fallback_codes.append(code)
+                continue
+            # 批量数据源已对单只失败的股票回退到限流的同步接口，这里为None即无数据
+            data = fetched[normalized_code]
+            if data is not None and not data.empty:
+                self._store_price_data((market, normalized_code, period), data)
+                stock_data[code] = data
+            else:
+                stock_data[code] = None
+        
+        if fallback_codes:
+            loop = asyncio.get_running_loop()
+            results = await asyncio.gather(
+                *(loop.run_in_executor(self._executor, self.get_stock_data, code, period) for code in fallback_codes),
+                return_exceptions=True
+            )
+            for code, result in zip(fallback_codes, results):
+                if isinstance(result, Exception):
+                    self.logger.error("批量获取 %s 价格数据时发生错误: %s", code, result)
+                    result = None
+                stock_data[code] = result
+        return stock_data
+    
+    def _get_cached_price_data(self, cache_key: PriceCacheKey) -> Optional[pd.DataFrame]:
+        """查询价格缓存，未命中或已过期返回None"""
+        with self._cache_lock:
+            entry = self.price_cache.get(cache_key)
+        if entry is None:
+            return None
+        self.logger.info("使用缓存的价格数据: %s", cache_key)
+        return entry[0]
+    
+    def _store_price_data(self, cache_key: PriceCacheKey, stock_data: pd.DataFrame) -> None:
+        """写入价格缓存，同时预先计算价格信息（缓存中的数据不再变化）"""
+        price_info = self.get_price_info(stock_data)
+        with self._cache_lock:
+            self.price_cache[cache_key] = (stock_data, price_info)
+    
+    def get_cached_info(self, stock_code: str, period: str = '1y') -> Optional[Dict[str, Any]]:
+        """
+        获取缓存中价格数据对应的价格信息（写入缓存时已计算好）
+        
+        Args:
+            stock_code: 股票代码
+            period: 时间周期
+            
+        Returns:
+            Dict[str, Any]: 价格信息字典，未缓存或已过期时返回None
+        """
+        stock_code, market = MarketUtils.normalize_stock_code(stock_code)
+        with self._cache_lock:
+            entry = self.price_cache.get((market, stock_code, period))
+        return dict(entry[1]) if entry is not None else None
+    
     def get_price_info(self, price_data: pd.DataFrame) -> Dict[str, Any]:
         """
         从价格数据中提取关键信息
@@ -117,7 +359,7 @@ class PriceDataFetcher:
         Returns:
             Dict[str, Any]: 价格信息字典
         """
-        if price_data is None or price_data.empty or 'close' not in price_data.columns:
+        if price_data is None or len(price_data) == 0 or 'close' not in price_data.columns:
             return {
                 'current_price': 0.0,
                 'price_change': 0.0,
@@ -126,29 +368,20 @@ class PriceDataFetcher:
             }
         
         try:
-            latest = price_data.iloc[-1]
-            current_price = float(latest['close'])
-            
-            if len(price_data) > 1:
-                prev_price = float(price_data.iloc[-2]['close'])
-                price_change = ((current_price - prev_price) / prev_price) * 100
+            # 一次取出底层数组，统计在单个数值内核中完成（有numba时为原生代码）
+            closes = price_data['close'].to_numpy(dtype=np.float64)
+            if 'volume' in price_data.columns:
+                volumes = price_data['volume'].to_numpy(dtype=np.float64)
             else:
-                price_change = 0.0
-                
-            # 计算成交量比率
-            volume_ratio = 1.0
-            if 'volume' in price_data.columns and len(price_data) >= 20:
-                current_volume = float(latest['volume']) if not pd.isna(latest['volume']) else 0
-                avg_volume = float(price_data['volume'].tail(20).mean())
-                if avg_volume > 0:
-                    volume_ratio = current_volume / avg_volume
-                
+                volumes = _EMPTY_VOLUMES
+            current_price, price_change, volume_ratio, volatility = _price_info_kernel(closes, volumes)
+            
             return {
-                'current_price': current_price,
-                'price_change': price_change,
-                'volume_ratio': volume_ratio,
-                'volatility': abs(price_change)
+                'current_price': float(current_price),
+                'price_change': float(price_change),
+                'volume_ratio': float(volume_ratio),
+                'volatility': float(volatility)
             }
         except Exception as e:
-            self.logger.error(f"计算价格信息失败: {e}")
+            self.logger.error("计算价格信息失败: %s", e)
             return {'current_price': 0.0, 'price_change': 0.0, 'volume_ratio': 1.0, 'volatility': 0.0}
\ No newline at end of file
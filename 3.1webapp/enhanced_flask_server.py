@@ -10,11 +10,12 @@ import logging
 import json
 import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date, time as dt_time
 import os
 import sys
 import math
 import numpy as np
+import pandas as pd
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 from functools import wraps
@@ -130,9 +131,6 @@ sse_manager = SSEManager()
 
 def clean_data_for_json(obj, _seen=None):
     """清理数据中的NaN、Infinity、日期等无效值，使其能够正确序列化为JSON"""
-    import pandas as pd
-    from datetime import datetime, date, time
-    
     # 初始化已访问对象集合，防止循环引用
     if _seen is None:
         _seen = set()
@@ -171,7 +169,7 @@ def clean_data_for_json(obj, _seen=None):
                 result = obj.item()
         elif isinstance(obj, (datetime, date)):
             result = obj.isoformat() if hasattr(obj, 'isoformat') else str(obj)
-        elif isinstance(obj, time):
+        elif isinstance(obj, dt_time):
             result = obj.isoformat()
         elif isinstance(obj, pd.Timestamp):
             result = obj.isoformat()
@@ -2773,7 +2771,7 @@ def analyze_stock_streaming(stock_code, enable_streaming, client_id, target_mark
         if price_data.empty:
             raise ValueError(f"无法获取股票 {market.upper()} {normalized_code} 的价格数据")
         
-        price_info = analyzer.get_price_info(price_data)
+        price_info = analyzer.price_fetcher.get_cached_info(normalized_code) or analyzer.get_price_info(price_data)
         market_config = analyzer.market_config.get(market, {})
         currency = market_config.get('currency', 'CNY')
         streamer.send_log(f"✓ 当前价格: {price_info['current_price']:.2f} {currency}", 'success')
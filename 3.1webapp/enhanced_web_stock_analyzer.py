@@ -16,6 +16,68 @@ import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Callable
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+
+try:
+    import akshare as ak
+except ImportError:
+    ak = None
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _build_sentiment_automaton(positive_words, negative_words):
+    """构建情绪词Aho-Corasick自动机，命中值为 (极性, 词)"""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in positive_words:
+        automaton.add_word(word, (1, word))
+    for word in negative_words:
+        automaton.add_word(word, (-1, word))
+    automaton.make_automaton()
+    return automaton
+
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _return_volatility(closes, window):
+    """最近window个日收益率的样本标准差（百分比），单次遍历（Welford算法）"""
+    n = closes.shape[0]
+    if n < window + 1:
+        return 0.0
+    mean = 0.0
+    m2 = 0.0
+    count = 0
+    for i in range(n - window, n):
+        ret = closes[i] / closes[i - 1] - 1.0
+        count += 1
+        delta = ret - mean
+        mean += delta / count
+        m2 += delta * (ret - mean)
+    return np.sqrt(m2 / (count - 1)) * 100.0
+
+
+if NUMBA_AVAILABLE:
+    _return_volatility = njit(cache=True)(_return_volatility)
+
+
+def _keyword_pattern(words):
+    """把关键词编译为前瞻正则，一次扫描即可找出全部（含相互重叠的）命中词"""
+    alternation = '|'.join(map(re.escape, sorted(words, key=len, reverse=True)))
+    return re.compile(f'(?=({alternation}))')
 
 # 忽略警告
 warnings.filterwarnings('ignore')
@@ -32,6 +94,57 @@ logging.basicConfig(
 class EnhancedWebStockAnalyzer:
     """增强版Web股票分析器（支持A股/港股/美股 + AI流式输出）"""
     
+    # 港美股全市场快照缓存：spot接口每次返回整个市场，多只股票共用同一份快照
+    _SNAPSHOT_TTL = timedelta(seconds=60)
+    _market_snapshot_cache: Dict[str, Tuple[datetime, Dict[str, Dict]]] = {}
+    _market_snapshot_lock = threading.Lock()
+    
+    # 已输出过的价格数据列结构
+    _logged_column_schemas = set()
+    
+    # 港股/美股补充指标的键名，类定义时生成一次
+    _HK_EXTRA_METRIC_KEYS = tuple(f'港股指标_{i + 1}' for i in range(20))
+    _US_EXTRA_METRIC_KEYS = tuple(f'US_Metric_{i + 1}' for i in range(17))
+    
+    # 港股/美股财务指标字段（基本指标 + 补充指标）
+    _HK_INDICATOR_KEYS = ('市盈率', '市净率', '股息收益率', '市值', '流通市值') + _HK_EXTRA_METRIC_KEYS
+    _US_INDICATOR_KEYS = ('PE_Ratio', 'PB_Ratio', 'Dividend_Yield', 'Market_Cap',
+                          'Revenue', 'Net_Income', 'EPS', 'ROE') + _US_EXTRA_METRIC_KEYS
+    
+    # 多语言情绪词典
+    _POSITIVE_WORDS = frozenset({
+        # 中文
+        '上涨', '涨停', '利好', '突破', '增长', '盈利', '收益', '回升', '强势', '看好',
+        '买入', '推荐', '优秀', '领先', '创新', '发展', '机会', '潜力', '稳定', '改善',
+        '提升', '超预期', '积极', '乐观', '向好', '受益', '龙头', '热点', '爆发', '翻倍',
+        # 英文
+        'buy', 'strong', 'growth', 'profit', 'gain', 'rise', 'bull', 'positive', 
+        'upgrade', 'outperform', 'beat', 'exceed', 'surge', 'rally', 'boom'
+    })
+    
+    _NEGATIVE_WORDS = frozenset({
+        # 中文
+        '下跌', '跌停', '利空', '破位', '下滑', '亏损', '风险', '回调', '弱势', '看空',
+        '卖出', '减持', '较差', '落后', '滞后', '困难', '危机', '担忧', '悲观', '恶化',
+        '下降', '低于预期', '消极', '压力', '套牢', '被套', '暴跌', '崩盘', '踩雷', '退市',
+        # 英文
+        'sell', 'weak', 'decline', 'loss', 'bear', 'negative', 'downgrade', 
+        'underperform', 'miss', 'fall', 'drop', 'crash', 'plunge', 'slump'
+    })
+    
+    # 参与情绪分析的新闻类别：(数据键, 类型, 权重, 与标题拼接的字段)
+    _SENTIMENT_SOURCES = (
+        ('company_news', 'company_news', 1.0, 'content'),
+        ('announcements', 'announcement', 1.2, 'content'),
+        ('research_reports', 'research_report', 0.9, 'rating'),
+    )
+    
+    # 情绪词自动机：一次扫描找出文本中出现的全部情绪词（未安装pyahocorasick时为None）
+    _SENTIMENT_AUTOMATON = _build_sentiment_automaton(_POSITIVE_WORDS, _NEGATIVE_WORDS)
+    # 没有自动机时的回退：预编译正则，每类情绪词对文本只扫描一次
+    _POSITIVE_RE = _keyword_pattern(_POSITIVE_WORDS)
+    _NEGATIVE_RE = _keyword_pattern(_NEGATIVE_WORDS)
+    
     def __init__(self, config_file='config.json'):
         """初始化分析器"""
         self.logger = logging.getLogger(__name__)
@@ -46,9 +159,29 @@ class EnhancedWebStockAnalyzer:
         self.fundamental_cache_duration = timedelta(hours=cache_config.get('fundamental_hours', 6))
         self.news_cache_duration = timedelta(hours=cache_config.get('news_hours', 2))
         
-        self.price_cache = {}
-        self.fundamental_cache = {}
-        self.news_cache = {}
+        # 价格/新闻缓存：TTLCache自带过期与容量上限，一次get完成查找与过期判断
+        self.price_cache = TTLCache(
+            maxsize=cache_config.get('price_max_entries', 512),
+            ttl=self.cache_duration.total_seconds()
+        )
+        # 基本面缓存按LRU淘汰，容量有上限，避免长期运行时无限增长
+        self.fundamental_cache = OrderedDict()
+        self.fundamental_cache_max_entries = cache_config.get('fundamental_max_entries', 10000)
+        self._fundamental_cache_seconds = self.fundamental_cache_duration.total_seconds()
+        # OrderedDict的move_to_end/popitem不是线程安全的，Flask多线程访问时需加锁
+        self._fundamental_cache_lock = threading.Lock()
+        self.news_cache = TTLCache(
+            maxsize=cache_config.get('news_max_entries', 512),
+            ttl=self.news_cache_duration.total_seconds()
+        )
+        
+        # cachetools缓存不是线程安全的，价格/新闻缓存的读写共用一把锁
+        self._cache_lock = threading.Lock()
+        
+        # 并发获取各项数据共用的线程池，避免每次请求重复创建线程
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.get('concurrency', 8), thread_name_prefix="analyze"
+        )
         
         # 分析权重配置
         weights = self.config.get('analysis_weights', {})
@@ -307,14 +440,15 @@ class EnhancedWebStockAnalyzer:
         stock_code, market = self.normalize_stock_code(stock_code)
         cache_key = f"{market}_{stock_code}"
         
-        if cache_key in self.price_cache:
-            cache_time, data = self.price_cache[cache_key]
-            if datetime.now() - cache_time < self.cache_duration:
-                self.logger.info(f"使用缓存的价格数据: {cache_key}")
-                return data
+        with self._cache_lock:
+            data = self.price_cache.get(cache_key)
+        if data is not None:
+            self.logger.info(f"使用缓存的价格数据: {cache_key}")
+            return data
         
         try:
-            import akshare as ak
+            if ak is None:
+                raise ImportError("akshare库未安装")
             
             end_date = datetime.now().strftime('%Y%m%d')
             days = self.analysis_params.get('technical_period_days', 180)
@@ -375,7 +509,8 @@ class EnhancedWebStockAnalyzer:
             stock_data = self._standardize_price_data_columns(stock_data, market)
             
             # 缓存数据
-            self.price_cache[cache_key] = (datetime.now(), stock_data)
+            with self._cache_lock:
+                self.price_cache[cache_key] = stock_data
             
             self.logger.info(f"✓ 成功获取 {market.upper()} {stock_code} 的价格数据，共 {len(stock_data)} 条记录")
             
@@ -389,7 +524,11 @@ class EnhancedWebStockAnalyzer:
         """标准化价格数据列名"""
         try:
             actual_columns = len(stock_data.columns)
-            self.logger.info(f"获取到 {actual_columns} 列数据，列名: {list(stock_data.columns)}")
+            # 同一市场的列结构基本固定，每种结构只输出一次列名
+            schema = (market, tuple(stock_data.columns))
+            if schema not in self._logged_column_schemas:
+                self._logged_column_schemas.add(schema)
+                self.logger.info(f"获取到 {actual_columns} 列数据，列名: {list(stock_data.columns)}")
             
             # 根据市场和实际列数进行映射
             if market == 'a_stock':
@@ -417,14 +556,15 @@ class EnhancedWebStockAnalyzer:
                 else:
                     standard_columns = [f'col_{i}' for i in range(actual_columns)]
             
-            # 创建列名映射
+            # 创建列名映射（数据是本次新获取的，直接原地重命名，不再复制一份）
             column_mapping = dict(zip(stock_data.columns, standard_columns))
-            stock_data = stock_data.rename(columns=column_mapping)
+            stock_data.rename(columns=column_mapping, inplace=True)
             
-            # 确保必要的列存在
+            # 确保必要的列存在（通常都已存在，只处理缺失的列）
             required_columns = ['close', 'open', 'high', 'low', 'volume']
+            existing_columns = set(stock_data.columns)
             for col in required_columns:
-                if col not in stock_data.columns:
+                if col not in existing_columns:
                     similar_cols = [c for c in stock_data.columns if col in c.lower() or c.lower() in col]
                     if similar_cols:
                         stock_data[col] = stock_data[similar_cols[0]]
@@ -441,13 +581,12 @@ class EnhancedWebStockAnalyzer:
                 self.logger.warning(f"日期处理失败: {e}")
             
             # 确保数值列为数值类型
-            numeric_columns = ['open', 'close', 'high', 'low', 'volume']
-            for col in numeric_columns:
-                if col in stock_data.columns:
-                    try:
-                        stock_data[col] = pd.to_numeric(stock_data[col], errors='coerce')
-                    except:
-                        pass
+            numeric_columns = [col for col in ('open', 'close', 'high', 'low', 'volume') if col in stock_data.columns]
+            if numeric_columns:
+                try:
+                    stock_data[numeric_columns] = stock_data[numeric_columns].apply(pd.to_numeric, errors='coerce')
+                except Exception:
+                    pass
             
             return stock_data
             
@@ -460,14 +599,19 @@ class EnhancedWebStockAnalyzer:
         stock_code, market = self.normalize_stock_code(stock_code)
         cache_key = f"{market}_{stock_code}"
         
-        if cache_key in self.fundamental_cache:
-            cache_time, data = self.fundamental_cache[cache_key]
-            if datetime.now() - cache_time < self.fundamental_cache_duration:
-                self.logger.info(f"使用缓存的基本面数据: {cache_key}")
-                return data
+        with self._fundamental_cache_lock:
+            entry = self.fundamental_cache.get(cache_key)
+            if entry is not None and time.monotonic() - entry[0] < self._fundamental_cache_seconds:
+                self.fundamental_cache.move_to_end(cache_key)
+            else:
+                entry = None
+        if entry is not None:
+            self.logger.info(f"使用缓存的基本面数据: {cache_key}")
+            return entry[1]
         
         try:
-            import akshare as ak
+            if ak is None:
+                raise ImportError("akshare库未安装")
             
             fundamental_data = {}
             self.logger.info(f"开始获取 {market.upper()} {stock_code} 的综合财务指标...")
@@ -480,7 +624,11 @@ class EnhancedWebStockAnalyzer:
                 fundamental_data = self._get_us_stock_fundamental_data(stock_code)
             
             # 缓存数据
-            self.fundamental_cache[cache_key] = (datetime.now(), fundamental_data)
+            with self._fundamental_cache_lock:
+                self.fundamental_cache[cache_key] = (time.monotonic(), fundamental_data)
+                self.fundamental_cache.move_to_end(cache_key)
+                if len(self.fundamental_cache) > self.fundamental_cache_max_entries:
+                    self.fundamental_cache.popitem(last=False)
             self.logger.info(f"✓ {market.upper()} {stock_code} 综合基本面数据获取完成并已缓存")
             
             return fundamental_data
@@ -497,77 +645,105 @@ class EnhancedWebStockAnalyzer:
             }
 
     def _get_a_stock_fundamental_data(self, stock_code):
-        """获取A股基本面数据"""
-        import akshare as ak
-        
+        """获取A股基本面数据（各项数据互不依赖，并发获取）"""
         fundamental_data = {}
         
         # 1. 基本信息
-        try:
-            self.logger.info("正在获取A股基本信息...")
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            info_dict = dict(zip(stock_info['item'], stock_info['value']))
-            fundamental_data['basic_info'] = info_dict
-            self.logger.info("✓ A股基本信息获取成功")
-        except Exception as e:
-            self.logger.warning(f"获取A股基本信息失败: {e}")
-            fundamental_data['basic_info'] = {}
+        def fetch_basic_info():
+            try:
+                self.logger.info("正在获取A股基本信息...")
+                stock_info = ak.stock_individual_info_em(symbol=stock_code)
+                info_dict = dict(zip(stock_info['item'], stock_info['value']))
+                self.logger.info("✓ A股基本信息获取成功")
+                return {'basic_info': info_dict}
+            except Exception as e:
+                self.logger.warning(f"获取A股基本信息失败: {e}")
+                return {'basic_info': {}}
         
         # 2. 财务指标
-        try:
-            self.logger.info("正在获取A股财务指标...")
-            financial_indicators = self._get_a_stock_financial_indicators(stock_code)
-            fundamental_data['financial_indicators'] = financial_indicators
-        except Exception as e:
-            self.logger.warning(f"获取A股财务指标失败: {e}")
-            fundamental_data['financial_indicators'] = {}
+        def fetch_financial_indicators():
+            try:
+                self.logger.info("正在获取A股财务指标...")
+                return {'financial_indicators': self._get_a_stock_financial_indicators(stock_code)}
+            except Exception as e:
+                self.logger.warning(f"获取A股财务指标失败: {e}")
+                return {'financial_indicators': {}}
         
         # 3. 估值指标
-        try:
-            valuation_data = ak.stock_a_indicator_lg(symbol=stock_code)
-            if not valuation_data.empty:
-                latest_valuation = valuation_data.iloc[-1].to_dict()
-                cleaned_valuation = self._clean_financial_data(latest_valuation)
-                fundamental_data['valuation'] = cleaned_valuation
-        except Exception as e:
-            self.logger.warning(f"获取A股估值指标失败: {e}")
-            fundamental_data['valuation'] = {}
+        def fetch_valuation():
+            try:
+                valuation_data = ak.stock_a_indicator_lg(symbol=stock_code)
+                if not valuation_data.empty:
+                    latest_valuation = valuation_data.iloc[-1].to_dict()
+                    return {'valuation': self._clean_financial_data(latest_valuation)}
+            except Exception as e:
+                self.logger.warning(f"获取A股估值指标失败: {e}")
+                return {'valuation': {}}
+            return {}
         
         # 4. 业绩预告
-        try:
-            performance_forecast = ak.stock_yjbb_em(symbol=stock_code)
-            if not performance_forecast.empty:
-                fundamental_data['performance_forecast'] = performance_forecast.head(10).to_dict('records')
-        except Exception as e:
-            fundamental_data['performance_forecast'] = []
+        def fetch_performance_forecast():
+            try:
+                performance_forecast = ak.stock_yjbb_em(symbol=stock_code)
+                if not performance_forecast.empty:
+                    return {'performance_forecast': performance_forecast.head(10).to_dict('records')}
+            except Exception as e:
+                return {'performance_forecast': []}
+            return {}
         
         # 5. 分红信息
-        try:
-            dividend_info = ak.stock_fhpg_em(symbol=stock_code)
-            if not dividend_info.empty:
-                fundamental_data['dividend_info'] = dividend_info.head(10).to_dict('records')
-        except Exception as e:
-            fundamental_data['dividend_info'] = []
+        def fetch_dividend_info():
+            try:
+                dividend_info = ak.stock_fhpg_em(symbol=stock_code)
+                if not dividend_info.empty:
+                    return {'dividend_info': dividend_info.head(10).to_dict('records')}
+            except Exception as e:
+                return {'dividend_info': []}
+            return {}
         
         # 6. 行业分析
-        fundamental_data['industry_analysis'] = self._get_industry_analysis(stock_code, 'a_stock')
+        def fetch_industry_analysis():
+            return {'industry_analysis': self._get_industry_analysis(stock_code, 'a_stock')}
+        
+        tasks = [fetch_basic_info, fetch_financial_indicators, fetch_valuation,
+                 fetch_performance_forecast, fetch_dividend_info, fetch_industry_analysis]
+        futures = [self._executor.submit(task) for task in tasks]
+        # 按提交顺序合并，保持字段顺序与串行版本一致
+        for future in futures:
+            fundamental_data.update(future.result())
         
         return fundamental_data
 
+    def _get_market_snapshot(self, market):
+        """获取港股/美股全市场快照，按代码建立字典索引（60秒内复用）"""
+        cached = self._market_snapshot_cache.get(market)
+        if cached is not None and datetime.now() - cached[0] < self._SNAPSHOT_TTL:
+            return cached[1]
+        
+        # 并发请求时只下载一次，其余线程等待后复用
+        with self._market_snapshot_lock:
+            cached = self._market_snapshot_cache.get(market)
+            if cached is not None and datetime.now() - cached[0] < self._SNAPSHOT_TTL:
+                return cached[1]
+            
+            spot_data = ak.stock_hk_spot_em() if market == 'hk_stock' else ak.stock_us_spot_em()
+            # 代码重复时保留第一条
+            spot_data = spot_data.drop_duplicates(subset='代码')
+            snapshot_index = spot_data.set_index('代码', drop=False).to_dict('index')
+            self._market_snapshot_cache[market] = (datetime.now(), snapshot_index)
+            return snapshot_index
+
     def _get_hk_stock_fundamental_data(self, stock_code):
         """获取港股基本面数据"""
-        import akshare as ak
-        
         fundamental_data = {}
         
         # 1. 基本信息
         try:
             self.logger.info("正在获取港股基本信息...")
             # 港股基本信息
-            hk_info = ak.stock_hk_spot_em()
-            stock_info = hk_info[hk_info['代码'] == stock_code]
-            if not stock_info.empty:
-                fundamental_data['basic_info'] = stock_info.iloc[0].to_dict()
+            stock_info = self._get_market_snapshot('hk_stock').get(stock_code)
+            if stock_info is not None:
+                fundamental_data['basic_info'] = dict(stock_info)
             else:
                 fundamental_data['basic_info'] = {'代码': stock_code, '市场': '港股'}
             self.logger.info("✓ 港股基本信息获取成功")
@@ -615,18 +791,15 @@ class EnhancedWebStockAnalyzer:
 
     def _get_us_stock_fundamental_data(self, stock_code):
         """获取美股基本面数据"""
-        import akshare as ak
-        
         fundamental_data = {}
         
         # 1. 基本信息
         try:
             self.logger.info("正在获取美股基本信息...")
             # 美股基本信息
-            us_info = ak.stock_us_spot_em()
-            stock_info = us_info[us_info['代码'] == stock_code.upper()]
-            if not stock_info.empty:
-                fundamental_data['basic_info'] = stock_info.iloc[0].to_dict()
+            stock_info = self._get_market_snapshot('us_stock').get(stock_code.upper())
+            if stock_info is not None:
+                fundamental_data['basic_info'] = dict(stock_info)
             else:
                 fundamental_data['basic_info'] = {'代码': stock_code.upper(), '市场': '美股'}
             self.logger.info("✓ 美股基本信息获取成功")
@@ -673,8 +846,6 @@ class EnhancedWebStockAnalyzer:
 
     def _get_a_stock_financial_indicators(self, stock_code):
         """获取A股详细财务指标"""
-        import akshare as ak
-        
         financial_indicators = {}
         
         try:
@@ -710,66 +881,17 @@ class EnhancedWebStockAnalyzer:
 
     def _calculate_hk_financial_indicators(self, raw_data):
         """计算港股财务指标"""
-        indicators = {}
-        
-        def safe_get(key, default=0):
-            value = raw_data.get(key, default)
-            try:
-                if value is None or value == '' or str(value).lower() in ['nan', 'none', '--']:
-                    return default
-                num_value = float(value)
-                if math.isnan(num_value) or math.isinf(num_value):
-                    return default
-                return num_value
-            except (ValueError, TypeError):
-                return default
-        
-        # 港股基本指标
-        indicators['市盈率'] = safe_get('市盈率')
-        indicators['市净率'] = safe_get('市净率')
-        indicators['股息收益率'] = safe_get('股息收益率')
-        indicators['市值'] = safe_get('市值')
-        indicators['流通市值'] = safe_get('流通市值')
-        
-        # 添加其他默认指标
-        for i in range(20):
-            key = f'港股指标_{i+1}'
-            indicators[key] = safe_get(key, 0)
-        
-        return indicators
+        return self._numeric_indicators(raw_data, self._HK_INDICATOR_KEYS)
 
     def _calculate_us_financial_indicators(self, raw_data):
         """计算美股财务指标"""
-        indicators = {}
-        
-        def safe_get(key, default=0):
-            value = raw_data.get(key, default)
-            try:
-                if value is None or value == '' or str(value).lower() in ['nan', 'none', '--']:
-                    return default
-                num_value = float(value)
-                if math.isnan(num_value) or math.isinf(num_value):
-                    return default
-                return num_value
-            except (ValueError, TypeError):
-                return default
-        
-        # 美股基本指标
-        indicators['PE_Ratio'] = safe_get('PE_Ratio')
-        indicators['PB_Ratio'] = safe_get('PB_Ratio')
-        indicators['Dividend_Yield'] = safe_get('Dividend_Yield')
-        indicators['Market_Cap'] = safe_get('Market_Cap')
-        indicators['Revenue'] = safe_get('Revenue')
-        indicators['Net_Income'] = safe_get('Net_Income')
-        indicators['EPS'] = safe_get('EPS')
-        indicators['ROE'] = safe_get('ROE')
-        
-        # 添加其他默认指标
-        for i in range(17):
-            key = f'US_Metric_{i+1}'
-            indicators[key] = safe_get(key, 0)
-        
-        return indicators
+        return self._numeric_indicators(raw_data, self._US_INDICATOR_KEYS)
+
+    @staticmethod
+    def _numeric_indicators(raw_data, keys):
+        """按指定字段一次性转换为浮点数，缺失、非数值及NaN/inf均记为0"""
+        values = pd.to_numeric(pd.Series(raw_data, dtype=object).reindex(list(keys)), errors='coerce')
+        return values.replace([np.inf, -np.inf], np.nan).fillna(0.0).to_dict()
 
     def _get_default_financial_indicators(self, market):
         """获取默认财务指标"""
@@ -867,8 +989,6 @@ class EnhancedWebStockAnalyzer:
     def _get_industry_analysis(self, stock_code, market):
         """获取行业分析数据（多市场）"""
         try:
-            import akshare as ak
-            
             industry_data = {}
             
             if market == 'a_stock':
@@ -902,16 +1022,17 @@ class EnhancedWebStockAnalyzer:
         stock_code, market = self.normalize_stock_code(stock_code)
         cache_key = f"{market}_{stock_code}_{days}"
         
-        if cache_key in self.news_cache:
-            cache_time, data = self.news_cache[cache_key]
-            if datetime.now() - cache_time < self.news_cache_duration:
-                self.logger.info(f"使用缓存的新闻数据: {cache_key}")
-                return data
+        with self._cache_lock:
+            data = self.news_cache.get(cache_key)
+        if data is not None:
+            self.logger.info(f"使用缓存的新闻数据: {cache_key}")
+            return data
         
         self.logger.info(f"开始获取 {market.upper()} {stock_code} 的综合新闻数据（最近{days}天）...")
         
         try:
-            import akshare as ak
+            if ak is None:
+                raise ImportError("akshare库未安装")
             
             all_news_data = {
                 'company_news': [],
@@ -930,7 +1051,8 @@ class EnhancedWebStockAnalyzer:
                 all_news_data = self._get_us_stock_news_data(stock_code, days)
             
             # 缓存数据
-            self.news_cache[cache_key] = (datetime.now(), all_news_data)
+            with self._cache_lock:
+                self.news_cache[cache_key] = all_news_data
             
             self.logger.info(f"✓ {market.upper()} {stock_code} 综合新闻数据获取完成，总计 {all_news_data['news_summary'].get('total_news_count', 0)} 条")
             return all_news_data
@@ -947,9 +1069,7 @@ class EnhancedWebStockAnalyzer:
             }
 
     def _get_a_stock_news_data(self, stock_code, days):
-        """获取A股新闻数据"""
-        import akshare as ak
-        
+        """获取A股新闻数据（新闻、公告、研报三个接口互不依赖，并发获取）"""
         all_news_data = {
             'company_news': [],
             'announcements': [],
@@ -960,63 +1080,94 @@ class EnhancedWebStockAnalyzer:
         }
         
         # 1. 公司新闻
-        try:
-            company_news = ak.stock_news_em(symbol=stock_code)
-            if not company_news.empty:
-                processed_news = []
-                for _, row in company_news.head(50).iterrows():
-                    news_item = {
-                        'title': str(row.get(row.index[0], '')),
-                        'content': str(row.get(row.index[1], '')) if len(row.index) > 1 else '',
-                        'date': str(row.get(row.index[2], '')) if len(row.index) > 2 else datetime.now().strftime('%Y-%m-%d'),
-                        'source': 'eastmoney',
-                        'url': str(row.get(row.index[3], '')) if len(row.index) > 3 else '',
-                        'relevance_score': 1.0
-                    }
-                    processed_news.append(news_item)
-                
-                all_news_data['company_news'] = processed_news
-        except Exception as e:
-            self.logger.warning(f"获取A股公司新闻失败: {e}")
+        def fetch_company_news():
+            try:
+                company_news = ak.stock_news_em(symbol=stock_code)
+                if not company_news.empty:
+                    news = company_news.head(50)
+                    processed_news = [
+                        {
+                            'title': title,
+                            'content': content,
+                            'date': date,
+                            'source': 'eastmoney',
+                            'url': url,
+                            'relevance_score': 1.0
+                        }
+                        for title, content, date, url in zip(
+                            self._positional_column(news, 0),
+                            self._positional_column(news, 1),
+                            self._positional_column(news, 2, datetime.now().strftime('%Y-%m-%d')),
+                            self._positional_column(news, 3)
+                        )
+                    ]
+                    
+                    return {'company_news': processed_news}
+            except Exception as e:
+                self.logger.warning(f"获取A股公司新闻失败: {e}")
+            return {}
         
         # 2. 公司公告
-        try:
-            announcements = ak.stock_zh_a_alerts_cls(symbol=stock_code)
-            if not announcements.empty:
-                processed_announcements = []
-                for _, row in announcements.head(30).iterrows():
-                    announcement = {
-                        'title': str(row.get(row.index[0], '')),
-                        'content': str(row.get(row.index[1], '')) if len(row.index) > 1 else '',
-                        'date': str(row.get(row.index[2], '')) if len(row.index) > 2 else datetime.now().strftime('%Y-%m-%d'),
-                        'type': str(row.get(row.index[3], '')) if len(row.index) > 3 else '公告',
-                        'relevance_score': 1.0
-                    }
-                    processed_announcements.append(announcement)
-                
-                all_news_data['announcements'] = processed_announcements
-        except Exception as e:
-            self.logger.warning(f"获取A股公司公告失败: {e}")
+        def fetch_announcements():
+            try:
+                announcements = ak.stock_zh_a_alerts_cls(symbol=stock_code)
+                if not announcements.empty:
+                    announcements = announcements.head(30)
+                    processed_announcements = [
+                        {
+                            'title': title,
+                            'content': content,
+                            'date': date,
+                            'type': announcement_type,
+                            'relevance_score': 1.0
+                        }
+                        for title, content, date, announcement_type in zip(
+                            self._positional_column(announcements, 0),
+                            self._positional_column(announcements, 1),
+                            self._positional_column(announcements, 2, datetime.now().strftime('%Y-%m-%d')),
+                            self._positional_column(announcements, 3, '公告')
+                        )
+                    ]
+                    
+                    return {'announcements': processed_announcements}
+            except Exception as e:
+                self.logger.warning(f"获取A股公司公告失败: {e}")
+            return {}
         
         # 3. 研究报告
-        try:
-            research_reports = ak.stock_research_report_em(symbol=stock_code)
-            if not research_reports.empty:
-                processed_reports = []
-                for _, row in research_reports.head(20).iterrows():
-                    report = {
-                        'title': str(row.get(row.index[0], '')),
-                        'institution': str(row.get(row.index[1], '')) if len(row.index) > 1 else '',
-                        'rating': str(row.get(row.index[2], '')) if len(row.index) > 2 else '',
-                        'target_price': str(row.get(row.index[3], '')) if len(row.index) > 3 else '',
-                        'date': str(row.get(row.index[4], '')) if len(row.index) > 4 else datetime.now().strftime('%Y-%m-%d'),
-                        'relevance_score': 0.9
-                    }
-                    processed_reports.append(report)
-                
-                all_news_data['research_reports'] = processed_reports
-        except Exception as e:
-            self.logger.warning(f"获取A股研究报告失败: {e}")
+        def fetch_research_reports():
+            try:
+                research_reports = ak.stock_research_report_em(symbol=stock_code)
+                if not research_reports.empty:
+                    reports = research_reports.head(20)
+                    processed_reports = [
+                        {
+                            'title': title,
+                            'institution': institution,
+                            'rating': rating,
+                            'target_price': target_price,
+                            'date': date,
+                            'relevance_score': 0.9
+                        }
+                        for title, institution, rating, target_price, date in zip(
+                            self._positional_column(reports, 0),
+                            self._positional_column(reports, 1),
+                            self._positional_column(reports, 2),
+                            self._positional_column(reports, 3),
+                            self._positional_column(reports, 4, datetime.now().strftime('%Y-%m-%d'))
+                        )
+                    ]
+                    
+                    return {'research_reports': processed_reports}
+            except Exception as e:
+                self.logger.warning(f"获取A股研究报告失败: {e}")
+            return {}
+        
+        tasks = [fetch_company_news, fetch_announcements, fetch_research_reports]
+        futures = [self._executor.submit(task) for task in tasks]
+        # 按提交顺序合并，与串行版本结果一致
+        for future in futures:
+            all_news_data.update(future.result())
         
         # 统计新闻数量
         total_news = (len(all_news_data['company_news']) + 
@@ -1035,6 +1186,17 @@ class EnhancedWebStockAnalyzer:
         
         return all_news_data
 
+    @staticmethod
+    def _positional_column(df, position, default=''):
+        """按位置取列并整列转为字符串列表，列不存在时用默认值填充"""
+        if df.shape[1] > position:
+            column = df.iloc[:, position]
+            if pd.api.types.is_datetime64_any_dtype(column):
+                # 日期列astype(str)在全为零点时会省略时间部分，逐个str()与逐行取值时的格式一致
+                return [str(value) for value in column]
+            return column.astype(str).tolist()
+        return [default] * len(df)
+
     def _get_hk_stock_news_data(self, stock_code, days):
         """获取港股新闻数据"""
         # 港股新闻数据相对有限，返回基本结构
@@ -1077,26 +1239,28 @@ class EnhancedWebStockAnalyzer:
             }
         }
 
+    def _count_sentiment_words(self, text):
+        """统计文本中出现的正面/负面情绪词个数（每个词只计一次）"""
+        if self._SENTIMENT_AUTOMATON is not None:
+            matched = {hit for _, hit in self._SENTIMENT_AUTOMATON.iter(text)}
+            positive_count = sum(1 for polarity, _ in matched if polarity > 0)
+            return positive_count, len(matched) - positive_count
+        
+        positive_count = len(set(self._POSITIVE_RE.findall(text)))
+        negative_count = len(set(self._NEGATIVE_RE.findall(text)))
+        return positive_count, negative_count
+
     def calculate_advanced_sentiment_analysis(self, comprehensive_news_data):
         """计算高级情绪分析（支持多市场）"""
         self.logger.info("开始高级情绪分析...")
         
         try:
-            # 准备所有新闻文本
-            all_texts = []
-            
-            # 收集所有新闻文本
-            for news in comprehensive_news_data.get('company_news', []):
-                text = f"{news.get('title', '')} {news.get('content', '')}"
-                all_texts.append({'text': text, 'type': 'company_news', 'weight': 1.0})
-            
-            for announcement in comprehensive_news_data.get('announcements', []):
-                text = f"{announcement.get('title', '')} {announcement.get('content', '')}"
-                all_texts.append({'text': text, 'type': 'announcement', 'weight': 1.2})
-            
-            for report in comprehensive_news_data.get('research_reports', []):
-                text = f"{report.get('title', '')} {report.get('rating', '')}"
-                all_texts.append({'text': text, 'type': 'research_report', 'weight': 0.9})
+            # 收集所有新闻文本：(文本, 类型, 权重)
+            all_texts = [
+                (f"{item.get('title', '')} {item.get(detail_field, '')}", text_type, weight)
+                for source_key, text_type, weight, detail_field in self._SENTIMENT_SOURCES
+                for item in comprehensive_news_data.get(source_key, [])
+            ]
             
             if not all_texts:
                 return {
@@ -1107,42 +1271,18 @@ class EnhancedWebStockAnalyzer:
                     'total_analyzed': 0
                 }
             
-            # 多语言情绪词典
-            positive_words = {
-                # 中文
-                '上涨', '涨停', '利好', '突破', '增长', '盈利', '收益', '回升', '强势', '看好',
-                '买入', '推荐', '优秀', '领先', '创新', '发展', '机会', '潜力', '稳定', '改善',
-                '提升', '超预期', '积极', '乐观', '向好', '受益', '龙头', '热点', '爆发', '翻倍',
-                # 英文
-                'buy', 'strong', 'growth', 'profit', 'gain', 'rise', 'bull', 'positive', 
-                'upgrade', 'outperform', 'beat', 'exceed', 'surge', 'rally', 'boom'
-            }
-            
-            negative_words = {
-                # 中文
-                '下跌', '跌停', '利空', '破位', '下滑', '亏损', '风险', '回调', '弱势', '看空',
-                '卖出', '减持', '较差', '落后', '滞后', '困难', '危机', '担忧', '悲观', '恶化',
-                '下降', '低于预期', '消极', '压力', '套牢', '被套', '暴跌', '崩盘', '踩雷', '退市',
-                # 英文
-                'sell', 'weak', 'decline', 'loss', 'bear', 'negative', 'downgrade', 
-                'underperform', 'miss', 'fall', 'drop', 'crash', 'plunge', 'slump'
-            }
-            
             # 分析每类新闻的情绪
             sentiment_by_type = {}
             overall_scores = []
             
-            for text_data in all_texts:
+            for text, text_type, weight in all_texts:
                 try:
-                    text = text_data['text'].lower()  # 转换为小写以匹配英文词汇
-                    text_type = text_data['type']
-                    weight = text_data['weight']
-                    
+                    # 空文本直接跳过，不做转换和匹配
                     if not text.strip():
                         continue
+                    text = text.lower()  # 转换为小写以匹配英文词汇
                     
-                    positive_count = sum(1 for word in positive_words if word in text)
-                    negative_count = sum(1 for word in negative_words if word in text)
+                    positive_count, negative_count = self._count_sentiment_words(text)
                     
                     # 计算情绪得分
                     total_sentiment_words = positive_count + negative_count
@@ -1164,7 +1304,8 @@ class EnhancedWebStockAnalyzer:
                     continue
             
             # 计算总体情绪
-            overall_sentiment = sum(overall_scores) / len(overall_scores) if overall_scores else 0.0
+            score_array = np.asarray(overall_scores, dtype=np.float64)
+            overall_sentiment = float(score_array.mean()) if score_array.size else 0.0
             
             # 计算各类型平均情绪
             avg_sentiment_by_type = {}
@@ -1193,8 +1334,8 @@ class EnhancedWebStockAnalyzer:
                 'confidence_score': confidence_score,
                 'total_analyzed': len(all_texts),
                 'type_distribution': {k: len(v) for k, v in sentiment_by_type.items()},
-                'positive_ratio': len([s for s in overall_scores if s > 0]) / len(overall_scores) if overall_scores else 0,
-                'negative_ratio': len([s for s in overall_scores if s < 0]) / len(overall_scores) if overall_scores else 0
+                'positive_ratio': float((score_array > 0).mean()) if score_array.size else 0,
+                'negative_ratio': float((score_array < 0).mean()) if score_array.size else 0
             }
             
             self.logger.info(f"✓ 高级情绪分析完成: {sentiment_trend} (得分: {overall_sentiment:.3f})")
@@ -1509,7 +1650,8 @@ class EnhancedWebStockAnalyzer:
         try:
             stock_code, market = self.normalize_stock_code(stock_code)
             
-            import akshare as ak
+            if ak is None:
+                raise ImportError("akshare库未安装")
             
             if market == 'a_stock':
                 try:
@@ -1524,19 +1666,17 @@ class EnhancedWebStockAnalyzer:
             
             elif market == 'hk_stock':
                 try:
-                    hk_info = ak.stock_hk_spot_em()
-                    stock_info = hk_info[hk_info['代码'] == stock_code]
-                    if not stock_info.empty:
-                        return stock_info['名称'].iloc[0]
+                    stock_info = self._get_market_snapshot('hk_stock').get(stock_code)
+                    if stock_info is not None:
+                        return stock_info['名称']
                 except Exception as e:
                     self.logger.warning(f"获取港股名称失败: {e}")
             
             elif market == 'us_stock':
                 try:
-                    us_info = ak.stock_us_spot_em()
-                    stock_info = us_info[us_info['代码'] == stock_code.upper()]
-                    if not stock_info.empty:
-                        return stock_info['名称'].iloc[0]
+                    stock_info = self._get_market_snapshot('us_stock').get(stock_code.upper())
+                    if stock_info is not None:
+                        return stock_info['名称']
                 except Exception as e:
                     self.logger.warning(f"获取美股名称失败: {e}")
             
@@ -1608,11 +1748,8 @@ class EnhancedWebStockAnalyzer:
             # 计算波动率
             volatility = 0.0
             try:
-                close_prices = price_data['close'].dropna()
-                if len(close_prices) >= 20:
-                    returns = close_prices.pct_change().dropna()
-                    if len(returns) >= 20:
-                        volatility = safe_float(returns.tail(20).std() * 100)
+                close_prices = price_data['close'].dropna().to_numpy(dtype=np.float64)
+                volatility = safe_float(_return_volatility(close_prices, 20))
             except Exception as e:
                 self.logger.warning(f"计算波动率失败: {e}")
                 volatility = 0.0
@@ -16,6 +16,7 @@ import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Callable, Any
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # 导入新的数据获取模块
 from data_fetchers import PriceDataFetcher, FundamentalDataFetcher, NewsDataFetcher, MarketUtils
@@ -35,6 +36,11 @@ logging.basicConfig(
 class EnhancedWebStockAnalyzer:
     """增强版Web股票分析器（支持A股/港股/美股 + AI流式输出）- 重构版"""
     
+    # 基本面分析的指标名匹配
+    _PE_KEY_RE = re.compile(r'市盈率|PE|pe')
+    _GROWTH_KEY_RE = re.compile(r'营业收入|净利润|增长|同比')
+    _ROE_KEY_RE = re.compile(r'ROE|roe|净资产收益率')
+    
     def __init__(self, config_file='config.json'):
         """初始化分析器"""
         self.logger = logging.getLogger(__name__)
@@ -48,6 +54,9 @@ class EnhancedWebStockAnalyzer:
         self.fundamental_fetcher = FundamentalDataFetcher(self.config)
         self.news_fetcher = NewsDataFetcher(self.config)
         
+        # 价格、基本面、新闻请求互不依赖，分析时并发获取
+        self._executor = ThreadPoolExecutor(max_workers=self.config.get('concurrency', 8), thread_name_prefix="analyze")
+        
         # 分析权重配置
         weights = self.config.get('analysis_weights', {})
         self.analysis_weights = {
@@ -431,17 +440,38 @@ class EnhancedWebStockAnalyzer:
             signals = []
             score = 0.5  # 中性起点
             
-            # PE分析
-            pe_keywords = ['市盈率', 'PE', 'pe']
+            # 一次遍历提取PE（首个可解析值）、增长类指标、ROE（首个可解析值）
             pe_value = None
+            roe_value = None
+            growth_signals = []
             for key, value in fundamental_data.items():
-                if any(keyword in key for keyword in pe_keywords):
+                if pe_value is None and self._PE_KEY_RE.search(key):
                     try:
                         pe_value = float(str(value).replace(',', ''))
-                        break
                     except:
-                        continue
+                        pass
+                
+                if self._GROWTH_KEY_RE.search(key):
+                    try:
+                        value_str = str(value)
+                        if '%' in value_str:
+                            growth_rate = float(value_str.replace('%', ''))
+                            if growth_rate > 20:
+                                growth_signals.append(f"{key}增长良好({growth_rate:.1f}%)")
+                                score += 0.05
+                            elif growth_rate < -10:
+                                growth_signals.append(f"{key}下滑明显({growth_rate:.1f}%)")
+                                score -= 0.05
+                    except:
+                        pass
+                
+                if roe_value is None and self._ROE_KEY_RE.search(key):
+                    try:
+                        roe_value = float(str(value).replace('%', ''))
+                    except:
+                        pass
             
+            # PE分析
             if pe_value and pe_value > 0:
                 if pe_value < 15:
                     signals.append(f"市盈率({pe_value:.1f})较低，估值合理")
@@ -453,37 +483,16 @@ class EnhancedWebStockAnalyzer:
                     signals.append(f"市盈率({pe_value:.1f})适中")
             
             # 营收和利润增长
-            growth_keywords = ['营业收入', '净利润', '增长', '同比']
-            for key, value in fundamental_data.items():
-                if any(keyword in key for keyword in growth_keywords):
-                    try:
-                        value_str = str(value)
-                        if '%' in value_str:
-                            growth_rate = float(value_str.replace('%', ''))
-                            if growth_rate > 20:
-                                signals.append(f"{key}增长良好({growth_rate:.1f}%)")
-                                score += 0.05
-                            elif growth_rate < -10:
-                                signals.append(f"{key}下滑明显({growth_rate:.1f}%)")
-                                score -= 0.05
-                    except:
-                        continue
+            signals.extend(growth_signals)
             
             # ROE分析
-            roe_keywords = ['ROE', 'roe', '净资产收益率']
-            for key, value in fundamental_data.items():
-                if any(keyword in key for keyword in roe_keywords):
-                    try:
-                        roe_value = float(str(value).replace('%', ''))
-                        if roe_value > 15:
-                            signals.append(f"净资产收益率({roe_value:.1f}%)优秀")
-                            score += 0.1
-                        elif roe_value < 5:
-                            signals.append(f"净资产收益率({roe_value:.1f}%)较低")
-                            score -= 0.05
-                        break
-                    except:
-                        continue
+            if roe_value is not None:
+                if roe_value > 15:
+                    signals.append(f"净资产收益率({roe_value:.1f}%)优秀")
+                    score += 0.1
+                elif roe_value < 5:
+                    signals.append(f"净资产收益率({roe_value:.1f}%)较低")
+                    score -= 0.05
             
             # 限制得分范围
             score = max(0, min(1, score))
@@ -648,19 +657,18 @@ class EnhancedWebStockAnalyzer:
             
             elif market == 'hk_stock':
                 try:
-                    hk_info = ak.stock_hk_spot_em()
-                    stock_info = hk_info[hk_info['代码'] == stock_code]
-                    if not stock_info.empty:
-                        return stock_info['名称'].iloc[0]
+                    # 按代码索引的快照缓存查找，避免每次下载全市场数据再逐行比较
+                    stock_name = self.fundamental_fetcher.get_stock_info(stock_code, market).get('股票名称')
+                    if stock_name:
+                        return stock_name
                 except Exception as e:
                     self.logger.warning(f"获取港股名称失败: {e}")
             
             elif market == 'us_stock':
                 try:
-                    us_info = ak.stock_us_spot_em()
-                    stock_info = us_info[us_info['代码'] == stock_code.upper()]
-                    if not stock_info.empty:
-                        return stock_info['名称'].iloc[0]
+                    stock_name = self.fundamental_fetcher.get_stock_info(stock_code.upper(), market).get('股票名称')
+                    if stock_name:
+                        return stock_name
                 except Exception as e:
                     self.logger.warning(f"获取美股名称失败: {e}")
             
@@ -670,36 +678,6 @@ class EnhancedWebStockAnalyzer:
             self.logger.warning(f"获取股票名称时出错: {e}")
             return stock_code
     
-    def get_price_info(self, price_data):
-        """从价格数据中提取关键信息"""
-        if price_data is None or price_data.empty or 'close' not in price_data.columns:
-            return {
-                'current_price': 0.0,
-                'price_change': 0.0,
-                'volume_ratio': 1.0,
-                'volatility': 0.0
-            }
-        
-        try:
-            latest = price_data.iloc[-1]
-            current_price = float(latest['close'])
-            
-            if len(price_data) > 1:
-                prev_price = float(price_data.iloc[-2]['close'])
-                price_change = ((current_price - prev_price) / prev_price) * 100
-            else:
-                price_change = 0.0
-                
-            return {
-                'current_price': current_price,
-                'price_change': price_change,
-                'volume_ratio': 1.0,
-                'volatility': abs(price_change)
-            }
-        except Exception as e:
-            self.logger.error(f"计算价格信息失败: {e}")
-            return {'current_price': 0.0, 'price_change': 0.0, 'volume_ratio': 1.0, 'volatility': 0.0}
-    
     def calculate_technical_score(self, technical_analysis):
         """计算技术分析得分"""
         if not technical_analysis:
@@ -1238,20 +1216,36 @@ class EnhancedWebStockAnalyzer:
             # 标准化股票代码
             normalized_code, market = self.normalize_stock_code(stock_code)
             
-            # 获取价格数据
-            price_data = self.get_stock_data(normalized_code)
+            # 基本面和新闻数据在后台获取，与价格数据的请求重叠
+            fundamental_future = self._executor.submit(self.get_comprehensive_fundamental_data, normalized_code)
+            news_future = self._executor.submit(self.get_comprehensive_news_data, normalized_code)
+            
+            # 获取价格数据；失败时取消尚未开始执行的后台请求
+            try:
+                price_data = self.get_stock_data(normalized_code)
+            except Exception:
+                fundamental_future.cancel()
+                news_future.cancel()
+                raise
             if price_data is None:
+                fundamental_future.cancel()
+                news_future.cancel()
                 return {"error": "无法获取价格数据"}
             
+            # 价格信息在写入价格缓存时已算好，缓存未命中（如数据刚过期）时再现算
+            price_info = self.price_fetcher.get_cached_info(normalized_code)
+            if price_info is None:
+                price_info = self.get_price_info(price_data)
+            
             # 计算技术指标
             technical_analysis = self.calculate_technical_indicators(price_data)
             
             # 计算各项得分
             technical_score = self.calculate_technical_score(technical_analysis)
-            fundamental_data = self.get_comprehensive_fundamental_data(normalized_code)
+            fundamental_data = fundamental_future.result()
             fundamental_score = self.calculate_fundamental_score(fundamental_data)
             
-            news_data = self.get_comprehensive_news_data(normalized_code)
+            news_data = news_future.result()
             sentiment_analysis = self.calculate_advanced_sentiment_analysis(news_data)
             sentiment_score = self.calculate_sentiment_score(sentiment_analysis)
             
@@ -1270,7 +1264,7 @@ class EnhancedWebStockAnalyzer:
                 'market': market,
                 'scores': scores,
                 'recommendation': recommendation,
-                'price_info': self.get_price_info(price_data),
+                'price_info': price_info,
                 'technical_analysis': technical_analysis,
                 'fundamental_data': fundamental_data,
                 'news_data': news_data,
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+测试历史行情parquet磁盘缓存（不访问网络）
+"""
+
+import os
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from data_fetchers.data_sources import akshare_source
+from data_fetchers.data_sources.akshare_source import _cached_hist
+
+pytestmark = pytest.mark.skipif(not akshare_source.PYARROW_AVAILABLE, reason="需要pyarrow读写parquet缓存")
+
+KEY = 'a_stock_000001_365'
+
+
+def _bars(dates, closes):
+    """构造只含date/close两列的日K线"""
+    return pd.DataFrame({'date': pd.to_datetime(dates), 'close': [float(c) for c in closes]})
+
+
+class _FakeFetch:
+    """记录调用参数的数据获取函数"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def __call__(self, start_date):
+        self.calls.append(start_date)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """把parquet缓存目录指向临时目录"""
+    monkeypatch.setattr(akshare_source, '_CACHE_DIR', tmp_path)
+    return tmp_path
+
+
+def _write_stale(cache_dir, data, age=7200):
+    """写入缓存文件并把修改时间调到age秒之前，返回文件路径和修改时间"""
+    path = cache_dir / f"{KEY}.parquet"
+    data.to_parquet(path, engine='pyarrow')
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path, mtime
+
+
+def test_cached_hist_first_fetch_trims_and_writes(cache_dir):
+    """无缓存时全量获取，裁剪到窗口后写入缓存"""
+    fetch = _FakeFetch(_bars(['2024-01-01', '2024-01-02', '2024-01-03'], [1, 2, 3]))
+
+    data = _cached_hist(KEY, fetch, start_date='20240102')
+
+    assert fetch.calls == [None]
+    assert list(data['close']) == [2.0, 3.0]
+    written = pd.read_parquet(cache_dir / f"{KEY}.parquet")
+    assert list(written['close']) == [2.0, 3.0]
+
+
+def test_cached_hist_fresh_cache_skips_fetch(cache_dir):
+    """缓存未过期时直接返回，不请求数据"""
+    _bars(['2024-01-02', '2024-01-03'], [2, 3]).to_parquet(cache_dir / f"{KEY}.parquet", engine='pyarrow')
+    fetch = _FakeFetch(error=AssertionError("不应请求数据"))
+
+    data = _cached_hist(KEY, fetch, start_date='20240101')
+
+    assert fetch.calls == []
+    assert list(data['close']) == [2.0, 3.0]
+
+
+def test_cached_hist_incremental_update(cache_dir):
+    """缓存过期时从最后一根已收盘K线起增量获取，替换未收盘K线并追加新数据"""
+    path, mtime = _write_stale(cache_dir, _bars(['2024-01-02', '2024-01-03', '2024-01-04'], [2, 3, 4]))
+    fetch = _FakeFetch(_bars(['2024-01-03', '2024-01-04', '2024-01-05'], [3, 4.5, 5]))
+
+    data = _cached_hist(KEY, fetch, start_date='20240101')
+
+    assert fetch.calls == ['20240103']
+    assert list(data['date'].dt.strftime('%Y-%m-%d')) == ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']
+    assert list(data['close']) == [2.0, 3.0, 4.5, 5.0]
+    assert path.stat().st_mtime > mtime
+    assert len(pd.read_parquet(path)) == 4
+
+
+def test_cached_hist_incremental_trims_window(cache_dir):
+    """增量更新后裁剪掉窗口起始日期之前的数据，缓存文件不会无限增长"""
+    path, _ = _write_stale(cache_dir, _bars(['2024-01-01', '2024-01-02', '2024-01-03'], [1, 2, 3]))
+    fetch = _FakeFetch(_bars(['2024-01-02', '2024-01-03', '2024-01-04'], [2, 3, 4]))
+
+    data = _cached_hist(KEY, fetch, start_date='20240102')
+
+    assert list(data['close']) == [2.0, 3.0, 4.0]
+    assert list(pd.read_parquet(path)['close']) == [2.0, 3.0, 4.0]
+
+
+def test_cached_hist_ex_dividend_refetches_all(cache_dir):
+    """已收盘K线的收盘价变化（除权除息）时全量重新获取"""
+    _write_stale(cache_dir, _bars(['2024-01-02', '2024-01-03', '2024-01-04'], [2, 3, 4]))
+    full = _bars(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'], [1, 1.5, 2, 2.5])
+
+    def fetch(start_date):
+        if start_date is None:
+            return full
+        return _bars(['2024-01-03', '2024-01-05'], [1.5, 2.5])
+
+    data = _cached_hist(KEY, fetch, start_date='20240101')
+
+    assert list(data['close']) == [1.0, 1.5, 2.0, 2.5]
+
+
+def test_cached_hist_empty_fetch_touches_file(cache_dir):
+    """获取成功但没有新数据时只刷新修改时间，有效期内不再请求"""
+    path, mtime = _write_stale(cache_dir, _bars(['2024-01-02', '2024-01-03'], [2, 3]))
+    fetch = _FakeFetch(_bars([], []))
+
+    data = _cached_hist(KEY, fetch, start_date='20240101')
+
+    assert fetch.calls == ['20240102']
+    assert list(data['close']) == [2.0, 3.0]
+    assert path.stat().st_mtime > mtime
+
+    # 刷新后缓存重新生效
+    _cached_hist(KEY, _FakeFetch(error=AssertionError("不应请求数据")), start_date='20240101')
+
+
+def test_cached_hist_failed_fetch_keeps_mtime(cache_dir):
+    """增量获取失败时返回缓存数据，不刷新修改时间，下次调用继续尝试"""
+    path, mtime = _write_stale(cache_dir, _bars(['2024-01-02', '2024-01-03'], [2, 3]))
+    fetch = _FakeFetch(error=requests.ConnectionError("Connection aborted"))
+
+    data = _cached_hist(KEY, fetch, start_date='20240101')
+
+    assert list(data['close']) == [2.0, 3.0]
+    assert path.stat().st_mtime == pytest.approx(mtime)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试akshare接口限流器与重试判断（不访问网络）
+"""
+
+import types
+
+import pytest
+import requests
+
+from data_fetchers.data_sources import akshare_source
+from data_fetchers.data_sources.akshare_source import _AkRateLimiter, _is_retryable
+
+
+class _FakeCondition:
+    """替代threading.Condition：wait不阻塞，直接推进假时钟并记录等待时长"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.waits = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        self.clock.now += timeout
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的monotonic时钟"""
+    fake = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(akshare_source, 'time', types.SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+def _limiter(clock, rate=2.0, burst=3):
+    limiter = _AkRateLimiter(rate=rate, burst=burst)
+    limiter._condition = _FakeCondition(clock)
+    return limiter
+
+
+def test_rate_limiter_burst_then_wait(clock):
+    """突发容量内立即放行，之后按速率等待"""
+    limiter = _limiter(clock)
+
+    for _ in range(3):
+        limiter.acquire('push2his')
+    assert limiter._condition.waits == []
+
+    limiter.acquire('push2his')
+    assert limiter._condition.waits == [pytest.approx(0.5)]
+
+    # 其他接口的桶互不影响
+    limiter.acquire('push2')
+    assert len(limiter._condition.waits) == 1
+
+
+def test_rate_limiter_refill(clock):
+    """令牌按速率补充，且不超过突发容量"""
+    limiter = _limiter(clock)
+    for _ in range(3):
+        limiter.acquire('push2his')
+
+    clock.now += 0.5
+    limiter.acquire('push2his')
+    assert limiter._condition.waits == []
+
+    clock.now += 100.0
+    for _ in range(3):
+        limiter.acquire('push2his')
+    assert limiter._condition.waits == []
+    limiter.acquire('push2his')
+    assert limiter._condition.waits == [pytest.approx(0.5)]
+
+
+def _http_error(status_code):
+    """构造带HTTP响应的异常"""
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(f"{status_code} Error", response=response)
+
+
+def test_is_retryable_http_status():
+    """带响应的异常按状态码判断：只有429重试，5xx等其他错误直接抛出"""
+    assert _is_retryable(_http_error(429))
+    assert not _is_retryable(_http_error(500))
+    assert not _is_retryable(_http_error(503))
+    assert not _is_retryable(_http_error(404))
+
+
+def test_is_retryable_connection_errors():
+    """连接中断类错误按异常文本判断"""
+    assert _is_retryable(requests.ConnectionError("('Connection aborted.', RemoteDisconnected('Remote end closed'))"))
+    assert _is_retryable(ConnectionError("RemoteDisconnected"))
+    assert not _is_retryable(requests.ConnectionError("Max retries exceeded: Name or service not known"))
+
+
+def test_is_retryable_ignores_stock_code_429():
+    """异常文本中的股票代码（如600429）不当作限流"""
+    assert not _is_retryable(ValueError("获取600429数据失败"))
+    assert _is_retryable(ValueError("429 Client Error: Too Many Requests"))
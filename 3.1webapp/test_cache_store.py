@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测试SQLite持久化缓存（不访问网络）
+"""
+
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from data_fetchers.cache_store import KIND_PICKLE, PYARROW_AVAILABLE, SqliteCache
+
+
+def test_set_get_delete_roundtrip(tmp_path):
+    """写入、读取、删除"""
+    cache = SqliteCache(tmp_path / 'cache.db')
+    value = {'news': [{'title': '测试'}], 'sentiment': {'score': 0.5}}
+
+    cache.set('news_a_stock_000001_15', value, ttl=60)
+    assert cache.get('news_a_stock_000001_15') == value
+    assert cache.get('missing') is None
+
+    cache.delete('news_a_stock_000001_15')
+    assert cache.get('news_a_stock_000001_15') is None
+
+
+def test_get_entry_remaining_ttl(tmp_path):
+    """get_entry返回剩余有效期"""
+    cache = SqliteCache(tmp_path / 'cache.db')
+    cache.set('key', [1, 2, 3], ttl=60)
+
+    value, remaining = cache.get_entry('key')
+
+    assert value == [1, 2, 3]
+    assert 0 < remaining <= 60
+
+
+def test_expired_entry_is_deleted(tmp_path):
+    """过期条目读取时返回None并删除"""
+    path = tmp_path / 'cache.db'
+    cache = SqliteCache(path)
+    cache.set('key', 'value', ttl=0.01)
+    time.sleep(0.05)
+
+    assert cache.get_entry('key') is None
+    with sqlite3.connect(str(path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+
+
+def test_survives_reopen(tmp_path):
+    """重新打开数据库后仍能命中"""
+    path = tmp_path / 'cache.db'
+    SqliteCache(path).set('key', {'a': 1}, ttl=60)
+
+    assert SqliteCache(path).get('key') == {'a': 1}
+
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="需要pyarrow")
+def test_dataframe_roundtrip(tmp_path):
+    """DataFrame按parquet编码存取"""
+    cache = SqliteCache(tmp_path / 'cache.db')
+    frame = pd.DataFrame({'date': pd.to_datetime(['2024-01-02', '2024-01-03']), 'close': [1.5, 2.5]})
+
+    cache.set('frame', frame, ttl=60)
+
+    pd.testing.assert_frame_equal(cache.get('frame'), frame)
+
+
+def test_migrates_old_schema(tmp_path):
+    """没有kind列的旧库自动补列，旧条目按pickle读取"""
+    import pickle
+
+    path = tmp_path / 'cache.db'
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, ts REAL NOT NULL, ttl REAL NOT NULL, blob BLOB NOT NULL)")
+        conn.execute("INSERT INTO cache (key, ts, ttl, blob) VALUES (?, ?, ?, ?)",
+                     ('old', time.time(), 60, pickle.dumps({'pe': 12.3})))
+
+    cache = SqliteCache(path)
+
+    with sqlite3.connect(str(path)) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+        assert 'kind' in columns
+        assert conn.execute("SELECT kind FROM cache WHERE key = 'old'").fetchone()[0] == KIND_PICKLE
+    assert cache.get('old') == {'pe': 12.3}
+
+    cache.set('new', {'pb': 1.1}, ttl=60)
+    assert cache.get('new') == {'pb': 1.1}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+测试股票代码标准化与市场识别（不访问网络）
+"""
+
+import logging
+
+import pytest
+
+from data_fetchers.market_utils import MarketUtils
+
+
+@pytest.mark.parametrize('raw, expected', [
+    # 纯数字A股
+    ('000001', ('000001', 'a_stock')),
+    ('600519', ('600519', 'a_stock')),
+    ('300750', ('300750', 'a_stock')),
+    ('1', ('000001', 'a_stock')),
+    ('519', ('000519', 'a_stock')),
+    # 4-5位且首位符合港股规则的按港股处理
+    ('00700', ('00700', 'hk_stock')),
+    ('0700', ('0700', 'hk_stock')),
+    ('09988', ('09988', 'hk_stock')),
+    # 4-5位但首位不符合港股规则的补齐为A股
+    ('4567', ('004567', 'a_stock')),
+    # 美股
+    ('AAPL', ('AAPL', 'us_stock')),
+    (' tsla ', ('TSLA', 'us_stock')),
+    ('BRK.B', ('BRK.B', 'us_stock')),
+])
+def test_classify_plain_codes(raw, expected):
+    """无后缀代码的市场识别"""
+    code, market, _notes = MarketUtils._classify_stock_code(raw)
+    assert (code, market) == expected
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('000001.SZ', ('000001', 'a_stock')),
+    ('600519.SS', ('600519', 'a_stock')),
+    ('600519.ss', ('600519', 'a_stock')),
+    # 后缀代码不足6位时补零
+    ('1234.SZ', ('001234', 'a_stock')),
+    ('12345.SZ', ('012345', 'a_stock')),
+    ('1234.SS', ('001234', 'a_stock')),
+    ('12345.SS', ('012345', 'a_stock')),
+    ('0700.HK', ('0700', 'hk_stock')),
+    ('VOD.L', ('VOD.L', 'us_stock')),
+])
+def test_classify_suffixed_codes(raw, expected):
+    """带交易所后缀代码的市场识别与补零"""
+    code, market, _notes = MarketUtils._classify_stock_code(raw)
+    assert (code, market) == expected
+
+
+def test_classify_truncates_long_a_stock_code():
+    """超过6位的A股代码截断为6位并记录警告"""
+    code, market, notes = MarketUtils._classify_stock_code('6005191')
+
+    assert (code, market) == ('600519', 'a_stock')
+    assert any(level == logging.WARNING for level, _ in notes)
+
+
+def test_normalize_logs_on_every_call(caplog):
+    """识别结果有缓存，但每次调用都输出诊断日志"""
+    with caplog.at_level(logging.INFO, logger='data_fetchers.market_utils'):
+        assert MarketUtils.normalize_stock_code('000001') == ('000001', 'a_stock')
+        assert MarketUtils.normalize_stock_code('000001') == ('000001', 'a_stock')
+
+    assert sum('000001' in record.getMessage() for record in caplog.records) == 2